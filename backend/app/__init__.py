@@ -1,12 +1,10 @@
 from dotenv import load_dotenv
 load_dotenv()
-from flask import Flask, current_app , jsonify
+from flask import Flask , jsonify
 from .extensions import db , migrate , mail , login_manager , cors , ph , limiter
 from .config import BaseConfig , TestingConfig , ProductionConfig , DevelopmentConfig
 from flask_talisman import Talisman
 import os
-from app.models import User
-from uuid import UUID
 
 def create_app(config_name = "deploy"):
     app = Flask(__name__)
@@ -47,10 +45,15 @@ def create_app(config_name = "deploy"):
     migrate.init_app(app , db)
     mail.init_app(app)
     login_manager.init_app(app)
-    cors.init_app(app, supports_credentials=True, origins=origin)
+    # keyset-paginated endpoints return the next page's cursor in X-Next-Cursor
+    cors.init_app(app, supports_credentials=True, origins=origin, expose_headers=["X-Next-Cursor"])
     limiter.init_app(app)
     Talisman(app, content_security_policy=None)
 
+    if app.config.get("SESSION_BACKEND", "cookie") != "cookie":
+        from app.utils.sessions import init_server_sessions
+        init_server_sessions(app)
+
 
     # login manager 
     login_manager.login_view = None
@@ -60,46 +63,29 @@ def create_app(config_name = "deploy"):
     def unauthorized():
         return jsonify({"message": "Authentication required"}), 401
 
+    from app.utils.hashing import HashingBusy
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(e):
+        response = jsonify({"message": "Server is busy, please try again shortly"})
+        response.headers["Retry-After"] = "2"
+        return response, 503
+
+    @app.errorhandler(429)
+    def rate_limited(e):
+        return jsonify({"message": f"Too many requests: {e.description}"}), 429
+
         
 
     @login_manager.user_loader
     def load_user(user_id):
-        # Robust loader: try direct get, attempt UUID conversion, then fallback to query
-        try:
-            current_app.logger.info(f"[LOAD_USER] raw_id={user_id} type={type(user_id)}")
-        except Exception:
-            pass
-
-        try:
-            # direct get (works when id type matches PK type)
-            user = db.session.get(User, user_id)
-            if user:
-                return user
-        except Exception:
-            # ignore and try fallbacks
-            pass
-
-        # try converting to UUID instance (some DB PKs are UUID objects)
-        try:
-            uid = UUID(str(user_id))
-            try:
-                user = db.session.get(User, uid)
-                if user:
-                    return user
-            except Exception:
-                pass
-        except Exception:
-            pass
-
-        # final fallback: query by string representation
-        try:
-            return User.query.filter_by(id=str(user_id)).first()
-        except Exception:
-            return None
-
-
-
-    # TODO: use Redis in production
+        # One query: the user plus its role profile, optionally served from
+        # a short-lived process-local cache (USER_CACHE_TTL)
+        from app.utils.identity import load_principal
+        return load_principal(user_id)
+
+
+
 
     #blueprints
     from .blueprints.auth.routes import auth_bp
@@ -110,6 +96,7 @@ def create_app(config_name = "deploy"):
     from .blueprints.student.routes import student_bp as student_api_bp
     from .blueprints.chatbot.routes import chatbot_bp
     from .blueprints.student.student_exam_routes import student_exam_bp
+    from .blueprints.uploads.routes import uploads_bp
 
 
     init_oauth(app)
@@ -120,6 +107,17 @@ def create_app(config_name = "deploy"):
     app.register_blueprint(chatbot_bp)
     register_course_blueprints(app)
     app.register_blueprint(student_exam_bp)
+    app.register_blueprint(uploads_bp)
+
+    # exam deadlines: a thread per process, only the lock holder works
+    if app.config.get("EXAM_DEADLINE_SCHEDULER"):
+        from app.utils.exam_deadlines import start_scheduler
+        start_scheduler(app)
+
+    # queued grading: graders pick up attempts left pending across a restart
+    if app.config.get("EXAM_GRADING_MODE") == "queued" and app.config.get("EXAM_GRADER_THREADS"):
+        from app.utils.grading import start_graders
+        start_graders(app)
 
     # Enforce SameSite=None; Secure on cookies when configured to do so.
     # Some hosting environments or proxies can rewrite cookie attributes; this
@@ -1,15 +1,16 @@
 from flask import Blueprint, request, jsonify , redirect , url_for , session
-from app.extensions import db, ph
+from app.extensions import db
 from app.models import User , TeacherProfile
 from marshmallow import ValidationError
 from app.blueprints.auth.schema import LoginSchema, RegisterSchema , ForgotPasswordSchema , ResetPasswordSchema
 from app.utils.emails import send_confirmation_url, send_password_reset_url, get_serializer
 from app.config import DevelopmentConfig , ProductionConfig
 from flask_login import login_user , login_required , current_user , logout_user
-from app.utils.decorators import roles_required
+from app.utils.decorators import roles_required, route_limit
+from app.utils.hashing import HashingBusy, hash_password, needs_rehash, verify_password
+from app.utils.identity import forget_principal
 import random 
 from datetime import datetime
-from argon2.exceptions import VerifyMismatchError
 from app.oauth import oauth
 import os
 from flask import current_app
@@ -41,16 +42,21 @@ def login_with_role(expected_role):
     
 
     
-    try:
-        ph.verify(user.password, data["password"])
-    except VerifyMismatchError as e: # type: ignore
+    if not verify_password(user.password, data["password"]):
         return jsonify({"message": "Wrong password"}), 400
+
+    # transparently upgrade hashes made with older cost parameters
+    if needs_rehash(user.password):
+        try:
+            user.password = hash_password(data["password"])
+        except HashingBusy:
+            pass
     
     if user.role != expected_role: 
         return jsonify({"message" : f"This login is for {expected_role} only"}) , 403
     
 
-    login_user(user , remember = True) 
+    login_user(user)
     session['role'] = user.role
     session['user_id'] = str(user.id)
     session.permanent = True
@@ -93,23 +99,27 @@ def check_profile():
 
 # ------------------------------------- student login --------------------------------
 @auth_bp.route("/login/student" , methods=['POST'])
+@route_limit("login")
 def login_student():
     return login_with_role("student")
 
 # ------------------------------------- parents login ----------------------------------
 
 @auth_bp.route("/login/teacher" , methods=['POST'])
+@route_limit("login")
 def login_teacher():
     return login_with_role("teacher")
 
 
 # -------------------------------------- admin login ------------------------------------
 @auth_bp.route("/login/admin" , methods=['POST'])
+@route_limit("login")
 def login_admin():
     return login_with_role("admin")
 
 # -------------------------------------- parent login ------------------------------------
 @auth_bp.route("/login/parent" , methods=['POST'])
+@route_limit("login")
 def login_parent():
     return login_with_role("parent")
 
@@ -127,7 +137,7 @@ def register_with_role(expected_role):
     if User.query.filter_by(email=data["email"]).first():
         return jsonify({"message": "Email already exists"}), 409
 
-    hashed = ph.hash(data["password"])
+    hashed = hash_password(data["password"])
 
     user = User(
         email=data["email"],
@@ -138,9 +148,8 @@ def register_with_role(expected_role):
     )
 
     db.session.add(user)
-    db.session.commit()
-
     send_confirmation_url(user)
+    db.session.commit()
 
     return jsonify({
         "message": "Check your email to confirm your account"
@@ -183,6 +192,7 @@ def forgot_password():
 
     if user:
         send_password_reset_url(user) 
+        db.session.commit()
         
         return jsonify({"message" : "Password reset email was sent"})   , 200
 
@@ -209,7 +219,7 @@ def reset_password(token):
     except ValidationError as err:
         return jsonify(err.messages) , 400
 
-    hashed = ph.hash(data['password'])
+    hashed = hash_password(data['password'])
     user.password = hashed
     db.session.commit()
     return jsonify({"message" : "Password was reset"})
@@ -301,6 +311,7 @@ def debug_config():
 @auth_bp.route("/logout" , methods=["GET" , "POST"])
 @login_required
 def logout():
+    forget_principal(current_user.id)
     logout_user()
     session.clear()
     return jsonify({"message" : "Logged out successfully"})
@@ -375,7 +386,7 @@ def oauth_callback(provider):
         created = True
 
     # login user
-    login_user(user, remember=True)
+    login_user(user)
     session['role'] = user.role
     session['user_id'] = str(user.id)
     session.permanent = True
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify, current_app
-from app.extensions import limiter
-from groq import Groq
-import os
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_login import login_required, current_user
+from app.extensions import db, limiter
+from app.models import Chapter, Course, CourseEnrollment, Lesson
+from app.utils.chat_cache import cache_scope, get_chat_cache
+from app.utils.decorators import roles_required, route_limit
+from app.utils.lesson_index import search_chunks
+from app.utils.llm import LLMBusy, LLMNotConfigured, acquire_llm_slot, get_llm
+from uuid import UUID
+import json
 
 # ------------------------
 # Blueprint
@@ -28,11 +34,20 @@ SYSTEM_PROMPT = """
         Be concise but complete.
     """.strip()
 
+CONTEXT_PROMPT = (
+    "Excerpts from the course the student is studying. "
+    "Use them when they help answer the question; otherwise ignore them.\n\n"
+)
+
+TEMPERATURE = 0.4
+MAX_TOKENS = 800
+
 # ------------------------
 # Route
 # ------------------------
 @chatbot_bp.route("/chat", methods=["POST"])
 @limiter.limit("30/minute")
+@route_limit("chat")
 def chat():
     data = request.get_json(silent=True) or {}
     message = (data.get("message") or "").strip()
@@ -44,28 +59,59 @@ def chat():
     if len(message) > 1000:
         return jsonify({"error": "Message too long"}), 400
 
-    groq_key = os.getenv("GROQ_API_KEY")
-    if not groq_key:
-        return jsonify({"error": "Groq API key not configured"}), 500
+    # ---- Course context (retrieved lesson chunks) ----
+    context = ""
+    sources = []
+    if data.get("lesson_id") or data.get("course_id"):
+        course_id, lesson_id, error = _resolve_context(data.get("course_id"), data.get("lesson_id"))
+        if error:
+            return error
+        chunks = search_chunks(
+            message,
+            course_id=course_id,
+            lesson_id=lesson_id,
+            k=current_app.config.get("CHAT_CONTEXT_CHUNKS", 3)
+        )
+        if chunks:
+            context = "\n\n".join(f"[{c['title']}]\n{c['text']}" for c in chunks)
+            sources = list({c["lesson_id"]: {"lesson_id": c["lesson_id"], "title": c["title"]} for c in chunks}.values())
 
-    # ---- Groq Client ----
-    client = Groq(api_key=groq_key)
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if context:
+        messages.append({"role": "system", "content": CONTEXT_PROMPT + context})
+    messages.append({"role": "user", "content": message})
+    wants_stream = bool(data.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
 
-    # ---- AI Call ----
     try:
-        completion = client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct-0905",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": message}
-            ],
-            temperature=0.4,
-            max_tokens=800
-        )
+        llm = get_llm()
+    except LLMNotConfigured as e:
+        return jsonify({"error": str(e)}), 500
+
+    # ---- Response cache ----
+    cache = get_chat_cache()
+    scope = cache_scope(llm.model, SYSTEM_PROMPT, context)
+    cached = cache.get(scope, message)
+    if cached is not None:
+        if wants_stream:
+            return _sse_response(iter([_sse("token", {"delta": cached}), _sse("done", {"answer": cached, "cached": True, "sources": sources})]))
+        return jsonify({"answer": cached, "cached": True, "sources": sources})
+
+    try:
+        release = acquire_llm_slot()
+    except LLMBusy:
+        response = jsonify({"error": "AI tutor is busy, please retry shortly"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
 
-        answer = completion.choices[0].message.content.strip()
+    if wants_stream:
+        return _stream_response(llm, messages, release, sources, on_done=lambda answer: cache.put(scope, message, answer))
 
-        return jsonify({"answer": answer})
+    # ---- AI Call ----
+    try:
+        answer = llm.complete(messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS)
+        if answer:
+            cache.put(scope, message, answer)
+        return jsonify({"answer": answer, "sources": sources})
 
     except Exception as e:
         current_app.logger.exception("Groq API failure")
@@ -73,3 +119,92 @@ def chat():
             "error": "AI service failed",
             "details": str(e)
         }), 500
+    finally:
+        release()
+
+
+def _resolve_context(course_id, lesson_id):
+    """Validate the requested lesson/course and the caller's access to it.
+
+    Returns (course_id, lesson_id, error_response).
+    """
+    if not current_user.is_authenticated:
+        return None, None, (jsonify({"error": "Login required for course context"}), 401)
+
+    try:
+        lesson_id = UUID(str(lesson_id)) if lesson_id else None
+        course_id = UUID(str(course_id)) if course_id else None
+    except ValueError:
+        return None, None, (jsonify({"error": "Invalid lesson_id or course_id"}), 400)
+
+    if lesson_id is not None:
+        course_id = (
+            db.session.query(Chapter.course_id)
+            .join(Lesson, Lesson.chapter_id == Chapter.id)
+            .filter(Lesson.id == lesson_id)
+            .scalar()
+        )
+    course = db.session.get(Course, course_id) if course_id else None
+    if course is None:
+        return None, None, (jsonify({"error": "Course not found"}), 404)
+
+    role = current_user.role
+    if role == "student":
+        student = current_user.student_profile
+        allowed = student is not None and db.session.query(
+            CourseEnrollment.query.filter_by(student_id=student.id, course_id=course.id).exists()
+        ).scalar()
+    elif role == "teacher":
+        allowed = current_user.teacher_profile is not None and course.teacher_id == current_user.teacher_profile.id
+    else:
+        allowed = role == "admin"
+
+    if not allowed:
+        return None, None, (jsonify({"error": "No access to this course"}), 403)
+    return course.id, lesson_id, None
+
+
+# ------------------------
+# Server-Sent Events
+# ------------------------
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _sse_response(events):
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _stream_response(llm, messages, release, sources, on_done=None):
+    def generate():
+        parts = []
+        try:
+            for delta in llm.stream(messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS):
+                parts.append(delta)
+                yield _sse("token", {"delta": delta})
+            answer = "".join(parts).strip()
+            if answer and on_done:
+                on_done(answer)
+            yield _sse("done", {"answer": answer, "sources": sources})
+        except Exception as e:
+            current_app.logger.exception("Groq API failure")
+            yield _sse("error", {"error": "AI service failed", "details": str(e)})
+
+    response = _sse_response(stream_with_context(generate()))
+    # the slot is held until the stream is fully sent or the client disconnects
+    response.call_on_close(release)
+    return response
+
+
+# ------------------------
+# Cache stats
+# ------------------------
+@chatbot_bp.route("/chat/cache/stats", methods=["GET"])
+@login_required
+@roles_required("admin")
+def chat_cache_stats():
+    return jsonify(get_chat_cache().stats()), 200
@@ -1,11 +1,17 @@
 # app/blueprints/courses/analytics.py
 
-from flask import Blueprint, jsonify
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
-from app.models import Course, CourseEnrollment, CourseRating, ExamAttempt, Exam
+from app.models import Course, CourseEnrollment, CourseStats, ExamAttempt, Exam, StudentProfile
+from app.models.course_stats import rating_distribution
 from app.extensions import db
 from app.utils.decorators import roles_required
-from sqlalchemy import func
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+from app.utils.teacher_dashboard import load_teacher_dashboard
+from sqlalchemy import func, select
 
 analytics_bp = Blueprint(
     "analytics",
@@ -14,6 +20,72 @@ analytics_bp = Blueprint(
 )
 
 
+HISTOGRAM_BUCKETS = 10  # 0-10, 10-20, ... 90-100 (score is a percentage)
+
+
+def _exam_performance(course_id):
+    """Per-exam attempt statistics, aggregated in the database."""
+    score = ExamAttempt.score
+    rows = (
+        db.session.query(
+            Exam.id,
+            Exam.title,
+            func.count(ExamAttempt.id).label("total_attempts"),
+            func.avg(score).label("average_score"),
+            func.count(ExamAttempt.id).filter(ExamAttempt.passed.is_(True)).label("passed_count"),
+            func.percentile_cont(0.25).within_group(score).label("p25"),
+            func.percentile_cont(0.5).within_group(score).label("median"),
+            func.percentile_cont(0.75).within_group(score).label("p75"),
+            func.percentile_cont(0.9).within_group(score).label("p90"),
+        )
+        .join(ExamAttempt, ExamAttempt.exam_id == Exam.id)
+        .filter(Exam.course_id == course_id)
+        .group_by(Exam.id, Exam.title)
+        .order_by(Exam.title)
+        .all()
+    )
+    if not rows:
+        return []
+
+    bucket = func.least(func.floor(score * HISTOGRAM_BUCKETS / 100), HISTOGRAM_BUCKETS - 1)
+    histogram = {}
+    for exam_id, b, count in (
+        db.session.query(ExamAttempt.exam_id, bucket, func.count(ExamAttempt.id))
+        .join(Exam, Exam.id == ExamAttempt.exam_id)
+        .filter(Exam.course_id == course_id, score.isnot(None))
+        .group_by(ExamAttempt.exam_id, bucket)
+        .all()
+    ):
+        histogram.setdefault(exam_id, [0] * HISTOGRAM_BUCKETS)[int(b)] = count
+
+    width = 100 // HISTOGRAM_BUCKETS
+
+    def _pct(value):
+        return round(float(value), 2) if value is not None else None
+
+    return [
+        {
+            "exam_id": str(r.id),
+            "exam_title": r.title,
+            "total_attempts": r.total_attempts,
+            "average_score": round(float(r.average_score or 0), 2),
+            "passed_count": r.passed_count,
+            "pass_rate": round((r.passed_count / r.total_attempts) * 100, 2),
+            "percentiles": {
+                "p25": _pct(r.p25),
+                "median": _pct(r.median),
+                "p75": _pct(r.p75),
+                "p90": _pct(r.p90)
+            },
+            "score_histogram": [
+                {"range": f"{i * width}-{(i + 1) * width}", "count": count}
+                for i, count in enumerate(histogram.get(r.id, [0] * HISTOGRAM_BUCKETS))
+            ]
+        }
+        for r in rows
+    ]
+
+
 @analytics_bp.route("/courses/<uuid:course_id>", methods=["GET"])
 @login_required
 @roles_required("teacher")
@@ -23,47 +95,34 @@ def get_course_analytics(course_id):
         teacher_id=current_user.teacher_profile.id
     ).first_or_404()
 
-    # Student enrollment count
-    total_enrollments = CourseEnrollment.query.filter_by(course_id=course.id).count()
-
-    # Average course rating
-    ratings = db.session.query(func.avg(CourseRating.rating)).filter_by(course_id=course.id).scalar()
-    average_rating = float(ratings) if ratings else 0.0
-
-    # Total ratings count
-    total_ratings = CourseRating.query.filter_by(course_id=course.id).count()
-
-    # Get all exams for this course
-    exams = Exam.query.filter_by(course_id=course.id).all()
-
-    exam_performance = []
-    for exam in exams:
-        attempts = ExamAttempt.query.filter_by(exam_id=exam.id).all()
-        if attempts:
-            avg_score = sum(a.score for a in attempts if a.score is not None) / len([a for a in attempts if a.score is not None])
-            passed_count = len([a for a in attempts if a.passed])
-            exam_performance.append({
-                "exam_id": str(exam.id),
-                "exam_title": exam.title,
-                "total_attempts": len(attempts),
-                "average_score": round(avg_score, 2),
-                "passed_count": passed_count,
-                "pass_rate": round((passed_count / len(attempts)) * 100, 2) if attempts else 0
-            })
+    # Enrollment and rating counters
+    stats = db.session.get(CourseStats, course.id)
+    total_enrollments = stats.enrollment_count if stats else 0
+    average_rating = float(stats.average_rating) if stats else 0.0
+    total_ratings = stats.rating_count if stats else 0
+
+    exam_performance = _exam_performance(course.id)
 
     # Student engagement (average progress)
-    enrollments = CourseEnrollment.query.filter_by(course_id=course.id).all()
-    avg_progress = sum(e.progress_percent for e in enrollments) / len(enrollments) if enrollments else 0
+    avg_progress, completed_enrollments = (
+        db.session.query(
+            func.coalesce(func.avg(CourseEnrollment.progress_percent), 0),
+            func.count(CourseEnrollment.id).filter(CourseEnrollment.completed.is_(True))
+        )
+        .filter(CourseEnrollment.course_id == course.id)
+        .one()
+    )
 
     return jsonify({
         "course_id": str(course.id),
         "course_title": course.title,
         "thumbnail_url": course.thumbnail_url,
         "total_enrollments": total_enrollments,
-        "completed_enrollments": len([e for e in enrollments if e.completed]),
+        "completed_enrollments": completed_enrollments,
         "average_rating": round(average_rating, 2),
         "total_ratings": total_ratings,
-        "average_progress": round(avg_progress, 2),
+        "rating_distribution": rating_distribution(stats),
+        "average_progress": round(float(avg_progress), 2),
         "exam_performance": exam_performance
     }), 200
 
@@ -72,44 +131,16 @@ def get_course_analytics(course_id):
 @login_required
 @roles_required("teacher")
 def get_teacher_dashboard():
-    teacher_id = current_user.teacher_profile.id
-
-    # Get all courses for teacher
-    courses = Course.query.filter_by(teacher_id=teacher_id).all()
-
-    total_students = 0
-    total_revenue = 0.0
-    course_summaries = []
-
-    for course in courses:
-        enrollments = CourseEnrollment.query.filter_by(course_id=course.id).count()
-        total_students += enrollments
-
-        # Calculate revenue (if price is set)
-        if course.price:
-            course_revenue = float(course.price) * enrollments
-            total_revenue += course_revenue
-
-        # Get ratings
-        ratings = db.session.query(func.avg(CourseRating.rating)).filter_by(course_id=course.id).scalar()
-        avg_rating = float(ratings) if ratings else 0.0
-
-        course_summaries.append({
-            "id": str(course.id),
-            "title": course.title,
-            "thumbnail_url": course.thumbnail_url,
-            "status": course.status,
-            "enrollments": enrollments,
-            "average_rating": round(avg_rating, 2),
-            "revenue": round(float(course.price) * enrollments, 2) if course.price else 0
-        })
+    return jsonify(load_teacher_dashboard(current_user.teacher_profile.id)), 200
 
-    return jsonify({
-        "total_courses": len(courses),
-        "total_students": total_students,
-        "total_revenue": round(total_revenue, 2),
-        "courses": course_summaries
-    }), 200
+
+MAX_ROSTER_PAGE = 200
+
+# sort key -> (column, cursor value parser)
+ROSTER_SORTS = {
+    "enrolled_at": (CourseEnrollment.enrolled_at, datetime.fromisoformat),
+    "progress": (CourseEnrollment.progress_percent, float),
+}
 
 
 @analytics_bp.route("/courses/<uuid:course_id>/students", methods=["GET"])
@@ -121,26 +152,71 @@ def get_course_students(course_id):
         teacher_id=current_user.teacher_profile.id
     ).first_or_404()
 
-    enrollments = CourseEnrollment.query.filter_by(course_id=course.id).all()
+    sort = request.args.get("sort", "enrolled_at")
+    if sort not in ROSTER_SORTS:
+        return jsonify({"error": f"sort must be one of {', '.join(ROSTER_SORTS)}"}), 400
+    descending = request.args.get("order", "desc") != "asc"
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_ROSTER_PAGE)
+
+    sort_column, sort_type = ROSTER_SORTS[sort]
+    order = (sort_column.desc(), CourseEnrollment.id.desc()) if descending else (sort_column, CourseEnrollment.id)
+
+    # Completed attempts on this course's exams only (indexed by student_id)
+    exams_completed = (
+        select(func.count(ExamAttempt.id))
+        .join(Exam, Exam.id == ExamAttempt.exam_id)
+        .where(
+            ExamAttempt.student_id == CourseEnrollment.student_id,
+            Exam.course_id == course.id,
+            ExamAttempt.end_time.isnot(None)
+        )
+        .correlate(CourseEnrollment)
+        .scalar_subquery()
+    )
+
+    query = (
+        db.session.query(CourseEnrollment, StudentProfile, exams_completed.label("exams_completed"))
+        .join(StudentProfile, StudentProfile.id == CourseEnrollment.student_id)
+        .filter(CourseEnrollment.course_id == course.id)
+    )
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            position = decode_cursor(cursor, sort_type, uuid.UUID)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(keyset_after((sort_column, CourseEnrollment.id), position, descending))
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
     students_data = []
-    for enrollment in enrollments:
-        student = enrollment.student_id  # This would need the relationship
-        
-        # Get student's exam attempts
-        exam_attempts = ExamAttempt.query.filter_by(student_id=enrollment.student_id).all()
-        exams_completed = len([a for a in exam_attempts if a.end_time is not None])
-
+    for enrollment, student, completed_count in rows:
         students_data.append({
             "student_id": str(enrollment.student_id),
+            "name": f"{student.first_name or ''} {student.last_name or ''}".strip() or "Student",
+            "avatar": student.avatar_url,
             "enrolled_at": enrollment.enrolled_at.isoformat(),
             "progress": enrollment.progress_percent,
             "completed": enrollment.completed,
-            "exams_completed": exams_completed
+            "exams_completed": completed_count
         })
 
-    return jsonify({
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+
+    stats = db.session.get(CourseStats, course.id)
+    response = jsonify({
         "course_id": str(course.id),
-        "total_students": len(students_data),
-        "students": students_data
-    }), 200
+        "total_students": stats.enrollment_count if stats else 0,
+        "students": students_data,
+        "next_cursor": next_cursor
+    })
+    # also in X-Next-Cursor, like lesson comments and course reviews
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response, 200
@@ -36,7 +36,8 @@ def create_chapters(course_id):
             )
         )
 
-    db.session.bulk_save_objects(objects)
+    # add_all (not bulk_save_objects) so the course_stats hooks see the inserts
+    db.session.add_all(objects)
     db.session.commit()
 
     return jsonify({"created": len(objects)}), 201
@@ -5,6 +5,7 @@ from flask_login import login_required
 from app.models import Lesson
 from app.extensions import db
 from app.utils.decorators import roles_required
+from app.utils.lesson_index import reindex_lesson_safely
 
 content_bp = Blueprint(
     "lesson_content",
@@ -31,4 +32,5 @@ def lesson_content(lesson_id):
     lesson.content = data.get("content", lesson.content)
 
     db.session.commit()
+    reindex_lesson_safely(lesson)
     return jsonify({"message": "Updated"})
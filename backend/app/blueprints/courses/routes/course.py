@@ -5,7 +5,7 @@ from flask_login import login_required, current_user
 from app.models import Course
 from app.extensions import db
 from app.utils.decorators import roles_required
-from app.utils.cloudinary import upload_image
+from app.utils.uploads import spool_upload
 
 course_bp = Blueprint("course", __name__, url_prefix="/api/teacher/courses")
 
@@ -112,12 +112,21 @@ def upload_course_thumbnail(course_id):
         teacher_id=current_user.teacher_profile.id
     ).first_or_404()
 
-    public_id = f"course_{course.id}"
-    url = upload_image(file, public_id=public_id, folder="course_thumbnails", width=1200, height=675)
-    if not url:
-        return jsonify({"error": "Upload failed"}), 500
+    # Spooled to disk and pushed to storage in the background
+    try:
+        job = spool_upload(
+            file,
+            kind="course_thumbnail",
+            target_id=course.id,
+            owner_id=current_user.id,
+            public_id=f"course_{course.id}"
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    course.thumbnail_url = url
-    db.session.commit()
-
-    return jsonify({"thumbnail_url": url}), 200
+    return jsonify({
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": f"/api/uploads/{job.id}",
+        "thumbnail_url": course.thumbnail_url
+    }), 202
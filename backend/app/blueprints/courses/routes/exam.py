@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app.models import Course, Exam, ExamQuestion, ExamAttempt
 from app.extensions import db
+from app.utils.answer_keys import invalidate_answer_key
 from app.utils.decorators import roles_required
 from datetime import datetime, timedelta
 from sqlalchemy import func
@@ -15,6 +16,11 @@ exam_bp = Blueprint(
 )
 
 
+def _valid_points(value):
+    # exams.total_points is the NOT NULL sum of these
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value < float("inf")
+
+
 # ========================
 # EXAM CRUD OPERATIONS
 # ========================
@@ -37,7 +43,6 @@ def create_exam(course_id):
         description=data.get("description", ""),
         time_limit=data.get("time_limit", 60),
         passing_score=data.get("passing_score", 60.0),
-        total_points=data.get("total_points", 100.0),
         status="draft"
     )
 
@@ -70,7 +75,7 @@ def list_exams(course_id):
             "passing_score": exam.passing_score,
             "total_points": exam.total_points,
             "status": exam.status,
-            "question_count": exam.questions.count(),
+            "question_count": exam.question_count,
             "created_at": exam.created_at.isoformat()
         }
         for exam in exams
@@ -128,9 +133,9 @@ def update_exam(course_id, exam_id):
     exam.description = data.get("description", exam.description)
     exam.time_limit = data.get("time_limit", exam.time_limit)
     exam.passing_score = data.get("passing_score", exam.passing_score)
-    exam.total_points = data.get("total_points", exam.total_points)
 
     db.session.commit()
+    invalidate_answer_key(exam.id)
 
     return jsonify({"message": "Exam updated successfully"}), 200
 
@@ -147,6 +152,7 @@ def delete_exam(course_id, exam_id):
 
     db.session.delete(exam)
     db.session.commit()
+    invalidate_answer_key(exam.id)
 
     return jsonify({"message": "Exam deleted successfully"}), 200
 
@@ -167,6 +173,10 @@ def add_question(course_id, exam_id):
 
     data = request.get_json()
 
+    points = data.get("points", 10.0)
+    if not _valid_points(points):
+        return jsonify({"error": "points must be a non-negative number"}), 400
+
     # Get the next order number
     last_question = ExamQuestion.query.filter_by(exam_id=exam.id).order_by(ExamQuestion.order.desc()).first()
     order = (last_question.order + 1) if last_question else 1
@@ -177,12 +187,16 @@ def add_question(course_id, exam_id):
         question_type=data.get("question_type", "multiple_choice"),
         options=data.get("options", {}),
         correct_answer=data.get("correct_answer", ""),
-        points=data.get("points", 10.0),
+        points=points,
         order=order
     )
 
     db.session.add(question)
+    exam.question_count = Exam.question_count + 1
+    exam.total_points = Exam.total_points + points
+    exam.updated_at = func.now()  # new answer-key version for every worker
     db.session.commit()
+    invalidate_answer_key(exam.id)
 
     return jsonify({
         "question_id": str(question.id),
@@ -207,13 +221,20 @@ def update_question(course_id, exam_id, question_id):
 
     data = request.get_json()
 
+    if "points" in data and not _valid_points(data["points"]):
+        return jsonify({"error": "points must be a non-negative number"}), 400
+
     question.question_text = data.get("question_text", question.question_text)
     question.question_type = data.get("question_type", question.question_type)
     question.options = data.get("options", question.options)
     question.correct_answer = data.get("correct_answer", question.correct_answer)
+    old_points = question.points or 0
     question.points = data.get("points", question.points)
 
+    exam.total_points = Exam.total_points + ((question.points or 0) - old_points)
+    exam.updated_at = func.now()
     db.session.commit()
+    invalidate_answer_key(exam.id)
 
     return jsonify({"message": "Question updated successfully"}), 200
 
@@ -234,7 +255,11 @@ def delete_question(course_id, exam_id, question_id):
     ).first_or_404()
 
     db.session.delete(question)
+    exam.question_count = Exam.question_count - 1
+    exam.total_points = Exam.total_points - (question.points or 0)
+    exam.updated_at = func.now()
     db.session.commit()
+    invalidate_answer_key(exam.id)
 
     return jsonify({"message": "Question deleted successfully"}), 200
 
@@ -253,7 +278,7 @@ def publish_exam(course_id, exam_id):
         teacher_id=current_user.teacher_profile.id
     ).first_or_404()
 
-    if exam.questions.count() == 0:
+    if exam.question_count == 0:
         return jsonify({"error": "Cannot publish exam without questions"}), 400
 
     exam.status = "published"
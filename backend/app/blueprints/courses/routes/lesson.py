@@ -5,6 +5,7 @@ from flask_login import login_required, current_user
 from app.models import Chapter, Lesson
 from app.extensions import db
 from app.utils.decorators import roles_required
+from app.utils.lesson_index import reindex_lesson_safely, remove_lesson_safely
 
 lesson_bp = Blueprint(
     "lesson",
@@ -90,6 +91,7 @@ def update_lesson(chapter_id, lesson_id):
     lesson.content = data.get("content", lesson.content)
 
     db.session.commit()
+    reindex_lesson_safely(lesson)
 
     return jsonify({"message": "Lesson updated successfully"}), 200
 
@@ -105,6 +107,7 @@ def delete_lesson(chapter_id, lesson_id):
 
     db.session.delete(lesson)
     db.session.commit()
+    remove_lesson_safely(lesson_id)
 
     return jsonify({"message": "Lesson deleted successfully"}), 200
 
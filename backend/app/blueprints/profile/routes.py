@@ -1,6 +1,6 @@
 from flask import Blueprint , jsonify , request , current_app
 from app.extensions import db 
-from app.utils.cloudinary import upload_profile
+from app.utils.uploads import avatar_kind_for, spool_upload, upload_extension
 from app.models import StudentProfile , TeacherProfile , ParentProfile , ParentStudentLink
 from app.schema import StudentProfileSchema , TeacherSchema , ParentSchema
 from marshmallow import ValidationError
@@ -50,34 +50,25 @@ def handle_profile_update( * ,
             return jsonify({"message": "No profile found"}), 404
         return jsonify(schema.dump(profile)), 200
 
-    avatar_url = None
     try: 
         data = schema.load(request.form)
     except ValidationError as e:
         return jsonify(e.messages) , 400
 
     avatar_file = request.files.get("avatar")
+    avatar_kind = avatar_kind_for(model_class) if avatar_file else None
+    if avatar_kind:
+        try:
+            upload_extension(avatar_file)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-    if avatar_file:
-        avatar_url = upload_profile(
-            file = avatar_file , 
-            public_id= f"user_{current_user.id}_avatar"
-        )
     if not profile:
         profile = model_class(user_id = current_user.id)
 
     for key , value in data.items():
         setattr(profile , key , value)
     
-    if avatar_url:
-        if hasattr(profile, 'avatar_url'):
-            try:
-                profile.avatar_url = avatar_url
-            except Exception:
-                setattr(profile, 'avatar', avatar_url)
-        else:
-            setattr(profile, 'avatar', avatar_url)
-    
     if extra_fields_handlar:
         extra_fields_handlar(profile , data)
 
@@ -94,6 +85,22 @@ def handle_profile_update( * ,
     db.session.add(profile)
     db.session.commit()
 
+    # The avatar is uploaded in the background; avatar_url is set when the job finishes
+    if avatar_kind:
+        job = spool_upload(
+            avatar_file,
+            kind=avatar_kind,
+            target_id=profile.id,
+            owner_id=current_user.id,
+            public_id=f"user_{current_user.id}_avatar"
+        )
+        return jsonify({
+            "message": "Profile updated successfully" , 
+            "profile" : schema.dump(profile) , 
+            "role" : current_user.role ,
+            "avatar_upload" : job.to_dict()
+        }), 202
+
     return jsonify({
         "message": "Profile updated successfully" , 
         "profile" : schema.dump(profile) , 
@@ -1,17 +1,28 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models import (
     Course, CourseEnrollment, StudentProfile, CourseRating,
-    Lesson, Chapter, Exam, ExamAttempt, ExamQuestion, LessonComment
+    Lesson, Chapter, Exam, ExamAttempt, ExamQuestion, LessonComment, CourseStats
 )
 from app.models import LessonCompletion
+from app.models.course_stats import rating_distribution
 from app.extensions import db
 from app.utils.decorators import roles_required
-from sqlalchemy import func, desc
+from app.utils.ranking import global_rank_for
+from app.utils.leaderboard import get_leaderboard_page
+from app.utils.catalog import load_catalog_page, load_course_tree, course_with_teacher, course_teacher_name
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+from sqlalchemy import func
+from datetime import datetime
 import json
+import uuid
 
 student_bp = Blueprint("student_api", __name__, url_prefix="/api/student")
 
+MAX_COMMENTS_PAGE = 200
+MAX_REVIEWS_PAGE = 100
+COMMENT_STREAM_BATCH = 500
+
 
 # ========================
 # COURSE LISTING & DETAILS
@@ -24,57 +35,13 @@ def get_available_courses():
     """Get all available courses for enrollment"""
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 12, type=int)
-    
-    # Get published courses
-    courses = Course.query.filter_by(status="published").paginate(
-        page=page, per_page=per_page
-    )
-    
-    course_list = []
-    for c in courses.items:
-        # Build course list using actual model fields
-        try:
-            teacher_name = ""
-            if getattr(c, "teacher", None):
-                t = c.teacher
-                user = getattr(t, "user", None)
-                if user:
-                    teacher_name = f"{getattr(user, 'first_name', '') or ''} {getattr(user, 'last_name', '') or ''}".strip()
-                else:
-                    teacher_name = getattr(t, "platform_name", None) or "Instructor"
-
-            # compute average rating
-            avg_rating = db.session.query(func.avg(CourseRating.rating)).filter_by(course_id=c.id).scalar() or 0
-            review_count = db.session.query(func.count(CourseRating.id)).filter_by(course_id=c.id).scalar() or 0
-            enrolled_count = db.session.query(func.count(CourseEnrollment.id)).filter_by(course_id=c.id).scalar() or 0
-
-            chapter_count = 0
-            try:
-                chapter_count = c.chapters.count()
-            except Exception:
-                chapter_count = len(list(c.chapters)) if c.chapters else 0
-
-            course_list.append({
-                "id": str(c.id),
-                "title": c.title,
-                "description": c.description,
-                "price": float(c.price) if c.price else 0,
-                "thumbnail": getattr(c, "thumbnail_url", None) or None,
-                "teacher_name": teacher_name,
-                "rating": float(avg_rating or 0),
-                "review_count": int(review_count),
-                "enrolled_count": int(enrolled_count),
-                "chapter_count": int(chapter_count),
-                "created_at": c.created_at.isoformat() if c.created_at else None
-            })
-        except Exception as e:
-            current_app.logger.error(f"Error processing course {getattr(c,'id', 'unknown')}: {e}")
-            continue
-    
+
+    course_list, total, pages = load_catalog_page(page, per_page)
+
     return jsonify({
         "courses": course_list,
-        "total": courses.total,
-        "pages": courses.pages,
+        "total": total,
+        "pages": pages,
         "current_page": page
     }), 200
 
@@ -84,43 +51,18 @@ def get_available_courses():
 @roles_required("student")
 def get_course_detail(course_id):
     """Get course details with chapters and lessons"""
-    course = Course.query.filter_by(id=course_id, status="published").first_or_404()
+    course = course_with_teacher().filter_by(id=course_id, status="published").first_or_404()
+    student_id = current_user.student_profile.id
 
     enrollment = CourseEnrollment.query.filter_by(
-        student_id=current_user.student_profile.id,
+        student_id=student_id,
         course_id=course_id
     ).first()
 
-    chapters_data = []
-    for chapter in course.chapters:
-        lessons_data = [
-            {
-                "id": str(l.id),
-                "title": l.title,
-                "order": l.order,
-                "is_completed": False  # TODO: Check completion status
-            }
-            for l in chapter.lessons
-        ]
-        chapters_data.append({
-            "id": str(chapter.id),
-            "title": chapter.title,
-            "lessons": lessons_data
-        })
-
-    # compute avg rating
-    avg_rating = db.session.query(func.avg(CourseRating.rating)).filter_by(course_id=course.id).scalar() or 0
-    review_count = db.session.query(func.count(CourseRating.id)).filter_by(course_id=course.id).scalar() or 0
-    enrolled_count = db.session.query(func.count(CourseEnrollment.id)).filter_by(course_id=course.id).scalar() or 0
+    chapters_data, _, _ = load_course_tree(course.id, student_id if enrollment else None)
 
-    teacher_name = ""
-    if getattr(course, "teacher", None):
-        t = course.teacher
-        user = getattr(t, "user", None)
-        if user:
-            teacher_name = f"{getattr(user, 'first_name', '') or ''} {getattr(user, 'last_name', '') or ''}".strip()
-        else:
-            teacher_name = getattr(t, "platform_name", None) or "Instructor"
+    stats = db.session.get(CourseStats, course.id)
+    teacher_name = course_teacher_name(course)
 
     return jsonify({
         "id": str(course.id),
@@ -129,9 +71,10 @@ def get_course_detail(course_id):
         "price": float(course.price) if course.price else 0,
         "thumbnail": getattr(course, "thumbnail_url", None) or None,
         "teacher_name": teacher_name,
-        "rating": float(avg_rating or 0),
-        "review_count": int(review_count),
-        "enrolled_count": int(enrolled_count),
+        "rating": float(stats.average_rating) if stats else 0.0,
+        "review_count": stats.rating_count if stats else 0,
+        "rating_distribution": rating_distribution(stats),
+        "enrolled_count": stats.enrollment_count if stats else 0,
         "requirements": getattr(course, "requirements", None),
         "level": getattr(course, "level", None),
         "duration": getattr(course, "duration", None),
@@ -150,49 +93,13 @@ def get_course_for_learning(course_id):
         course_id=course_id
     ).first_or_404()
     
-    course = Course.query.filter_by(id=enrollment.course_id).first_or_404()
-    
-    chapters_data = []
-    total_lessons = 0
-    completed_lessons = 0
-    
-    for chapter in course.chapters:
-        lessons_data = []
-        for lesson in chapter.lessons:
-            # Safely determine completion status (method may not exist)
-            is_completed = False
-            try:
-                if hasattr(lesson, 'is_completed_by_student'):
-                    is_completed = bool(lesson.is_completed_by_student(current_user.student_profile.id))
-            except Exception:
-                is_completed = False
-
-            lessons_data.append({
-                "id": str(lesson.id),
-                "title": lesson.title,
-                "order": lesson.order,
-                "is_completed": is_completed
-            })
-            total_lessons += 1
-            if is_completed:
-                completed_lessons += 1
-        
-        chapters_data.append({
-            "id": str(chapter.id),
-            "title": chapter.title,
-            "lessons": lessons_data
-        })
-    
+    course = course_with_teacher().filter_by(id=enrollment.course_id).first_or_404()
+
+    chapters_data, total_lessons, completed_lessons = load_course_tree(
+        course.id, current_user.student_profile.id
+    )
     completion_percentage = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
-    
-    teacher_name = ""
-    if getattr(course, "teacher", None):
-        t = course.teacher
-        user = getattr(t, "user", None)
-        if user:
-            teacher_name = f"{getattr(user, 'first_name', '') or ''} {getattr(user, 'last_name', '') or ''}".strip()
-        else:
-            teacher_name = getattr(t, "platform_name", None) or "Instructor"
+    teacher_name = course_teacher_name(course)
 
     return jsonify({
         "id": str(course.id),
@@ -276,13 +183,13 @@ def submit_course_rating(course_id):
 
     db.session.commit()
 
-    avg = db.session.query(func.avg(CourseRating.rating)).filter_by(course_id=course_id).scalar() or 0
-    count = CourseRating.query.filter_by(course_id=course_id).count()
+    stats = db.session.get(CourseStats, course_id)
 
     return jsonify({
         "message": "Rating recorded",
-        "average_rating": float(avg),
-        "review_count": count
+        "average_rating": float(stats.average_rating) if stats else 0.0,
+        "review_count": stats.rating_count if stats else 0,
+        "rating_distribution": rating_distribution(stats)
     }), 200
 
 
@@ -290,24 +197,51 @@ def submit_course_rating(course_id):
 @login_required
 @roles_required("student")
 def list_course_reviews(course_id):
+    """Newest reviews first; paged like lesson comments (?limit=&cursor=, X-Next-Cursor)."""
     course = Course.query.filter_by(id=course_id, status="published").first_or_404()
 
-    reviews = CourseRating.query.filter_by(course_id=course_id).filter(CourseRating.review != None).order_by(CourseRating.created_at.desc()).all()
+    query = (
+        db.session.query(
+            CourseRating.id,
+            CourseRating.student_id,
+            CourseRating.rating,
+            CourseRating.review,
+            CourseRating.created_at,
+            StudentProfile.first_name,
+            StudentProfile.last_name
+        )
+        .outerjoin(StudentProfile, StudentProfile.id == CourseRating.student_id)
+        .filter(CourseRating.course_id == course.id, CourseRating.review != None)
+        .order_by(CourseRating.created_at.desc(), CourseRating.id.desc())
+    )
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            position = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(keyset_after((CourseRating.created_at, CourseRating.id), position, descending=True))
+
+    limit = min(max(request.args.get("limit", 20, type=int), 1), MAX_REVIEWS_PAGE)
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-    out = []
-    for r in reviews:
-        student = StudentProfile.query.get(r.student_id)
-        name = f"{student.first_name} {student.last_name}" if student else "Student"
-        out.append({
+    response = jsonify([
+        {
             "id": str(r.id),
             "student_id": str(r.student_id),
-            "student_name": name,
+            "student_name": f"{r.first_name or ''} {r.last_name or ''}".strip() or "Student",
             "rating": r.rating,
             "review": r.review,
             "created_at": r.created_at.isoformat()
-        })
-
-    return jsonify(out), 200
+        }
+        for r in rows
+    ])
+    if has_more:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return response, 200
 
 
 # ========================
@@ -341,35 +275,64 @@ def get_lesson_content(lesson_id):
 @login_required
 @roles_required("student")
 def list_lesson_comments(lesson_id):
+    """Newest first, one page per request.
+
+    ?limit=&cursor= pages on (created_at, id); the next page's cursor comes
+    back in the X-Next-Cursor header. ?format=ndjson streams every comment
+    after the cursor as one JSON object per line instead.
+    """
     lesson = Lesson.query.get_or_404(lesson_id)
 
-    comments = LessonComment.query.filter_by(lesson_id=lesson.id).order_by(LessonComment.created_at.desc()).all()
+    query = (
+        db.session.query(
+            LessonComment.id,
+            LessonComment.student_id,
+            LessonComment.content,
+            LessonComment.created_at,
+            StudentProfile.first_name,
+            StudentProfile.last_name,
+            StudentProfile.avatar_url
+        )
+        .outerjoin(StudentProfile, StudentProfile.id == LessonComment.student_id)
+        .filter(LessonComment.lesson_id == lesson.id)
+        .order_by(LessonComment.created_at.desc(), LessonComment.id.desc())
+    )
 
-    out = []
-    for c in comments:
-        student = None
+    cursor = request.args.get("cursor")
+    if cursor:
         try:
-            from app.models import StudentProfile
-            student = StudentProfile.query.get(c.student_id)
-        except Exception:
-            student = None
-
-        student_name = "Student"
-        student_avatar = None
-        if student:
-            student_name = f"{student.first_name or ''} {student.last_name or ''}".strip() or "Student"
-            student_avatar = getattr(student, 'avatar_url', None)
-
-        out.append({
-            "id": str(c.id),
-            "student_id": str(c.student_id),
-            "student_name": student_name,
-            "avatar": student_avatar,
-            "content": c.content,
-            "created_at": c.created_at.isoformat()
-        })
+            position = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(keyset_after((LessonComment.created_at, LessonComment.id), position, descending=True))
+
+    if request.args.get("format") == "ndjson":
+        def generate():
+            for row in query.yield_per(COMMENT_STREAM_BATCH):
+                yield json.dumps(_comment_json(row)) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_COMMENTS_PAGE)
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = jsonify([_comment_json(row) for row in rows])
+    if has_more:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return response, 200
+
 
-    return jsonify(out), 200
+def _comment_json(row):
+    return {
+        "id": str(row.id),
+        "student_id": str(row.student_id),
+        "student_name": f"{row.first_name or ''} {row.last_name or ''}".strip() or "Student",
+        "avatar": row.avatar_url,
+        "content": row.content,
+        "created_at": row.created_at.isoformat()
+    }
 
 
 @student_bp.route("/lessons/<uuid:lesson_id>/comments", methods=["POST"])
@@ -462,9 +425,10 @@ def get_course_exams(course_id):
     ).first_or_404()
     
     exams = Exam.query.filter_by(course_id=course_id, status="published").all()
-    attempts = ExamAttempt.query.filter_by(
-        student_id=current_user.student_profile.id
-    ).all()
+    attempts = ExamAttempt.query.filter(
+        ExamAttempt.student_id == current_user.student_profile.id,
+        ExamAttempt.exam_id.in_([e.id for e in exams])
+    ).all() if exams else []
     
     exams_data = [
         {
@@ -474,7 +438,7 @@ def get_course_exams(course_id):
             "time_limit": e.time_limit,
             "passing_score": e.passing_score,
             "total_points": e.total_points,
-            "question_count": e.questions.count() if e.questions else 0
+            "question_count": e.question_count
         }
         for e in exams
     ]
@@ -484,7 +448,7 @@ def get_course_exams(course_id):
             "id": str(a.id),
             "exam_id": str(a.exam_id),
             "score": a.score,
-            "attempted_at": a.attempted_at.isoformat()
+            "attempted_at": a.start_time.isoformat()
         }
         for a in attempts
     ]
@@ -537,34 +501,16 @@ def remove_friend(friend_id):
 @roles_required("student")
 def get_leaderboard():
     """Get global leaderboard"""
-    # Top students by average score and points
-    students = db.session.query(
-        StudentProfile,
-        func.avg(ExamAttempt.score).label("avg_score"),
-        func.count(CourseEnrollment.id).label("course_count"),
-        func.count(ExamAttempt.id).label("exam_count")
-    ).join(CourseEnrollment).join(ExamAttempt, isouter=True).group_by(
-        StudentProfile.id
-    ).order_by(
-        desc(func.avg(ExamAttempt.score))
-    ).limit(100).all()
-    
-    leaderboard_data = [
-        {
-            "id": str(s[0].id),
-            "name": s[0].first_name + " " + s[0].last_name,
-            "role_id": s[0].user.role_id,
-            "avatar": s[0].avatar,
-            "enrolled_courses": int(s[2] or 0),
-            "average_score": float(s[1] or 0),
-            # Use exam_count (s[3]) as a simple proxy for activity
-            "consistency_rate": min(int((s[3] or 0) * 5), 100),
-            "points": int((s[1] or 0) * 10)
-        }
-        for s in students
-    ]
-    
-    return jsonify({"leaderboard": leaderboard_data}), 200
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 100, type=int)
+
+    leaderboard_data, total = get_leaderboard_page(page, per_page)
+
+    return jsonify({
+        "leaderboard": leaderboard_data,
+        "total": total,
+        "current_page": page
+    }), 200
 
 
 # ========================
@@ -591,7 +537,7 @@ def get_analytics():
         "active_courses": len(enrollments),
         "avg_score": float(avg_score),
         "consistency_rate": 85,  # TODO: Improve calculation
-        "global_rank": None,
+        "global_rank": global_rank_for(student.id),
         "completed_lessons": int(completed_count),
         "exams_taken": len(attempts),
         "certificates_earned": 0,
@@ -609,27 +555,17 @@ def get_analytics():
 def get_courses_analytics():
     """Get analytics for each course"""
     student = current_user.student_profile
-    enrollments = CourseEnrollment.query.filter_by(
-        student_id=student.id
-    ).all()
+    enrollments = (
+        db.session.query(CourseEnrollment, Course, CourseStats)
+        .join(Course, Course.id == CourseEnrollment.course_id)
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .filter(CourseEnrollment.student_id == student.id)
+        .all()
+    )
     
     courses_data = []
-    for e in enrollments:
-        # ensure we can access course via relationship or fallback
-        course = getattr(e, 'course', None) or Course.query.filter_by(id=e.course_id).first()
-        if not course:
-            continue
-
-        # compute completion percentage
-        total_lessons = 0
-        completed = 0
-        for ch in course.chapters:
-            for l in ch.lessons:
-                total_lessons += 1
-                if LessonCompletion.query.filter_by(lesson_id=l.id, student_id=student.id).first():
-                    completed += 1
-
-        completion_percentage = int((completed / total_lessons * 100) if total_lessons > 0 else 0)
+    for e, course, stats in enrollments:
+        completion_percentage = e.progress_of(stats.lesson_count if stats else 0)
 
         courses_data.append({
             "id": str(course.id),
@@ -1,8 +1,15 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import update
 from app.extensions import db
 from app.models import Exam, ExamAttempt, ExamQuestion
-from datetime import datetime
+from app.utils.autosave import flush_answers, pending_answers, queue_answers
+from app.utils.decorators import route_limit
+from app.utils.exam_deadlines import finalize_attempts, is_expired, remaining_seconds
+from app.utils.grading import enqueue_submission, score_answers
+from app.utils.leaderboard import bump_leaderboard_version
+from app.utils.ranking import record_exam_score
+from datetime import datetime, timedelta
 import uuid
 
 student_exam_bp = Blueprint(
@@ -11,21 +18,37 @@ student_exam_bp = Blueprint(
     url_prefix="/api/student/exams"
 )
 
+MAX_EXAMS_PAGE = 100
+MAX_AUTOSAVE_ANSWERS = 200
+MAX_ANSWER_LENGTH = 5000
+
 # ---------------------------
 # List available exams
 # ---------------------------
 @student_exam_bp.route("", methods=["GET"])
 @login_required
 def list_exams():
-    exams = Exam.query.filter_by(status="published").all()
-
-    from app.models import StudentProfile
+    """Published exams of the student's enrolled courses, newest first (?page=&per_page=)."""
+    from app.models import CourseEnrollment, StudentProfile
 
     student_profile = StudentProfile.query.filter_by(user_id=current_user.id).first_or_404()
 
-    attempts = ExamAttempt.query.filter_by(
-        student_id=student_profile.id
-    ).all()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), MAX_EXAMS_PAGE)
+
+    pagination = (
+        Exam.query
+        .join(CourseEnrollment, CourseEnrollment.course_id == Exam.course_id)
+        .filter(CourseEnrollment.student_id == student_profile.id, Exam.status == "published")
+        .order_by(Exam.created_at.desc(), Exam.id)
+        .paginate(page=page, per_page=per_page, error_out=False)
+    )
+    exams = pagination.items
+
+    attempts = ExamAttempt.query.filter(
+        ExamAttempt.student_id == student_profile.id,
+        ExamAttempt.exam_id.in_([e.id for e in exams])
+    ).all() if exams else []
 
     return jsonify({
         "exams": [
@@ -36,7 +59,8 @@ def list_exams():
                 "description": e.description,
                 "time_limit": e.time_limit,
                 "passing_score": e.passing_score,
-                "total_questions": e.questions.count()
+                "total_questions": e.question_count,
+                "total_points": e.total_points
             }
             for e in exams
         ],
@@ -46,10 +70,14 @@ def list_exams():
                 "exam_id": str(a.exam_id),
                 "score": a.score,
                 "passed": a.passed,
+                "status": a.grading_status or "in_progress",
                 "started_at": a.start_time.isoformat()
             }
             for a in attempts
-        ]
+        ],
+        "total": pagination.total,
+        "pages": pagination.pages,
+        "current_page": page
     })
 
 
@@ -76,15 +104,21 @@ def get_exam(exam_id):
     ).first()
 
     if not attempt:
+        start_time = datetime.utcnow()
         attempt = ExamAttempt(
             id=uuid.uuid4(),
             exam_id=exam_id,
             student_id=student_profile.id,  # ✅ FIXED
-            start_time=datetime.utcnow(),
+            start_time=start_time,
+            deadline_at=start_time + timedelta(minutes=exam.time_limit) if exam.time_limit else None,
             answers={}
         )
         db.session.add(attempt)
         db.session.commit()
+    elif is_expired(attempt):
+        # the scheduler normally gets there first; covers it being off or behind
+        finalize_attempts([attempt.id])
+        db.session.refresh(attempt)
 
     return jsonify({
         "attempt_id": str(attempt.id),
@@ -92,6 +126,9 @@ def get_exam(exam_id):
         "attempt_end_time": attempt.end_time.isoformat() if attempt.end_time else None,
         "attempt_score": attempt.score,
         "attempt_submitted": bool(attempt.end_time),
+        "attempt_deadline_at": attempt.deadline_at.isoformat() if attempt.deadline_at else None,
+        "remaining_seconds": remaining_seconds(attempt),
+        "attempt_answers": {**(attempt.answers or {}), **pending_answers(attempt.id)},
         "id": str(exam.id),
         "title": exam.title,
         "description": exam.description,
@@ -111,11 +148,11 @@ def get_exam(exam_id):
 
 
 # ---------------------------
-# Submit exam attempt
+# Autosave answers (per-question deltas)
 # ---------------------------
-@student_exam_bp.route("/<uuid:exam_id>/attempt", methods=["POST"])
+@student_exam_bp.route("/<uuid:exam_id>/attempt/answers", methods=["PATCH"])
 @login_required
-def submit_exam(exam_id):
+def autosave_answers(exam_id):
     from app.models import StudentProfile
 
     student_profile = StudentProfile.query.filter_by(
@@ -129,44 +166,97 @@ def submit_exam(exam_id):
 
     if attempt.end_time:
         return jsonify({"error": "Exam already submitted"}), 403
+    if is_expired(attempt):
+        return jsonify({"error": "Time limit exceeded"}), 403
+
+    data = request.get_json(silent=True) or {}
+    delta = data.get("answers")
+    if not isinstance(delta, dict) or not delta:
+        return jsonify({"error": "answers must be a non-empty object"}), 400
+    if len(delta) > MAX_AUTOSAVE_ANSWERS:
+        return jsonify({"error": f"At most {MAX_AUTOSAVE_ANSWERS} answers per save"}), 400
+    for value in delta.values():
+        if value is not None and (not isinstance(value, str) or len(value) > MAX_ANSWER_LENGTH):
+            return jsonify({"error": f"Answers must be strings of at most {MAX_ANSWER_LENGTH} characters"}), 400
+
+    # the attempt may have been submitted or expired since it was loaded
+    if not queue_answers(attempt.id, delta):
+        return jsonify({"error": "Exam already submitted"}), 409
+    return jsonify({
+        "message": "Saved",
+        "saved": len(delta),
+        "remaining_seconds": remaining_seconds(attempt)
+    }), 200
 
-    data = request.get_json() or {}
-    answers = data.get("answers", {})
 
-    exam = attempt.exam
 
-    total_points = 0
-    earned_points = 0
+# ---------------------------
+# Submit exam attempt
+# ---------------------------
+@student_exam_bp.route("/<uuid:exam_id>/attempt", methods=["POST"])
+@login_required
+@route_limit("exam_submit")
+def submit_exam(exam_id):
+    from app.models import StudentProfile
 
-    for q in exam.questions:
-        total_points += q.points
-        student_answer = answers.get(str(q.id))
+    student_profile = StudentProfile.query.filter_by(
+        user_id=current_user.id
+    ).first_or_404()
 
-        if not student_answer:
-            continue
+    attempt = ExamAttempt.query.filter_by(
+        exam_id=exam_id,
+        student_id=student_profile.id
+    ).first_or_404()
 
-        if q.question_type == "multiple_choice":
-            if student_answer == q.correct_answer:
-                earned_points += q.points
+    if attempt.end_time:
+        return jsonify({"error": "Exam already submitted"}), 403
 
-        elif q.question_type == "short_answer":
-            if student_answer.strip().lower() == q.correct_answer.strip().lower():
-                earned_points += q.points
+    # too late: close the attempt with what was autosaved, ignore this body
+    if is_expired(attempt):
+        finalize_attempts([attempt.id])
+        return jsonify({
+            "error": "Time limit exceeded; your saved answers were submitted",
+            "attempt_id": str(attempt.id)
+        }), 403
 
-    score_percent = (earned_points / total_points * 100) if total_points else 0
-    passed = score_percent >= exam.passing_score
+    data = request.get_json() or {}
 
-    attempt.answers = answers
-    attempt.score = round(score_percent, 2)
-    attempt.passed = passed
-    attempt.end_time = datetime.utcnow()
+    # autosaved answers count; anything sent with the submission overrides them
+    flush_answers(attempt.id)
+    db.session.refresh(attempt)
+    answers = {**(attempt.answers or {}), **(data.get("answers") or {})}
+
+    # queued mode: store the raw answers and let the graders score them
+    if current_app.config.get("EXAM_GRADING_MODE") == "queued":
+        if not enqueue_submission(attempt.id, answers):
+            return jsonify({"error": "Exam already submitted"}), 403
+        return jsonify({
+            "attempt_id": str(attempt.id),
+            "status": "pending"
+        }), 202
+
+    # claim and grade in one guarded UPDATE: a double submit or the deadline
+    # scheduler closing the attempt meanwhile must not count the score twice
+    score, passed = score_answers(attempt.exam, answers)
+    claimed = db.session.execute(
+        update(ExamAttempt)
+        .where(ExamAttempt.id == attempt.id, ExamAttempt.end_time.is_(None))
+        .values(answers=answers, score=score, passed=passed, grading_status="graded", end_time=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return jsonify({"error": "Exam already submitted"}), 403
 
+    record_exam_score(student_profile.id, score)
     db.session.commit()
+    bump_leaderboard_version()
 
     return jsonify({
         "attempt_id": str(attempt.id),
-        "score": attempt.score,
-        "passed": attempt.passed
+        "status": "graded",
+        "score": score,
+        "passed": passed
     })
 
 
@@ -188,6 +278,7 @@ def exam_result(attempt_id):
 
     return jsonify({
         "exam_id": str(attempt.exam_id),
+        "status": attempt.grading_status or "in_progress",
         "score": attempt.score,
         "passed": attempt.passed,
         "started_at": attempt.start_time.isoformat(),
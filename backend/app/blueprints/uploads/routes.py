@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, current_app, send_from_directory, abort
+from flask_login import login_required, current_user
+from app.extensions import db
+from app.models import UploadJob
+
+
+uploads_bp = Blueprint("uploads", __name__)
+
+
+# ------------------------
+# Upload job status
+# ------------------------
+@uploads_bp.route("/api/uploads/<uuid:job_id>", methods=["GET"])
+@login_required
+def upload_status(job_id):
+    job = db.session.get(UploadJob, job_id)
+    if not job or job.owner_id != current_user.id:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+# ------------------------
+# Files stored by the local media backend
+# ------------------------
+@uploads_bp.route("/media/<path:filename>", methods=["GET"])
+def media(filename):
+    if current_app.config.get("MEDIA_STORAGE") != "local":
+        abort(404)
+    return send_from_directory(current_app.config["MEDIA_ROOT"], filename)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -33,6 +34,16 @@ class BaseConfig:
     SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
     SENDGRID_FROM_EMAIL = os.getenv("SENDGRID_FROM_EMAIL")
 
+    # Email outbox: transport (sendgrid | smtp | file) and dispatcher tuning
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "sendgrid")
+    EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", "sent_emails.jsonl")
+    EMAIL_DISPATCHER_THREAD = os.getenv("EMAIL_DISPATCHER_THREAD", "true").lower() == "true"
+    EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+    EMAIL_POLL_SECONDS = int(os.getenv("EMAIL_POLL_SECONDS", 10))
+    EMAIL_SEND_LEASE_SECONDS = int(os.getenv("EMAIL_SEND_LEASE_SECONDS", 300))
+
     # Session
     SESSION_COOKIE_NAME = "neuraacademy_session"
     SESSION_COOKIE_HTTPONLY = True
@@ -56,6 +67,99 @@ class BaseConfig:
     # OAuth
     OAUTHLIB_INSECURE_TRANSPORT = True
 
+    # Leaderboard: size of the cached top-N snapshot and its TTL (seconds)
+    LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 100))
+    LEADERBOARD_CACHE_TTL = int(os.getenv("LEADERBOARD_CACHE_TTL", 30))
+
+    # Teacher dashboard: per-teacher cache TTL (seconds). Writes only drop the
+    # entry in the worker that made them, so this bounds staleness elsewhere
+    TEACHER_DASHBOARD_CACHE_TTL = int(os.getenv("TEACHER_DASHBOARD_CACHE_TTL", 5))
+
+    # Authenticated user cache keyed by (user id, per-login nonce); 0 disables it
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 0))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 4096))
+
+    # Password hashing pool: concurrent hashes, waiting slots before 503, wait timeout (seconds).
+    # Per process: workers + queue must stay below the gunicorn thread count
+    # (GUNICORN_THREADS, Procfile) or requests run out before the queue fills
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 2))
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 6))
+    HASH_TIMEOUT = int(os.getenv("HASH_TIMEOUT", 30))
+
+
+    # Media uploads: storage backend (cloudinary | local), spool dir and worker pool
+    MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+    MEDIA_ROOT = os.path.abspath(os.getenv("MEDIA_ROOT", "media"))
+    MEDIA_URL = os.getenv("MEDIA_URL", "/media")
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "neuraacademy_uploads"))
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 2))
+    UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 3))
+    UPLOAD_RETRY_BASE_SECONDS = int(os.getenv("UPLOAD_RETRY_BASE_SECONDS", 5))
+
+
+    # AI tutor: backend (groq | fake), model and concurrency limit. The limit is
+    # per process and each streamed answer holds a gunicorn thread, so keep
+    # LLM_MAX_CONCURRENCY well below GUNICORN_THREADS (Procfile)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+    LLM_MODEL = os.getenv("LLM_MODEL", "moonshotai/kimi-k2-instruct-0905")
+    LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", 60))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+    LLM_QUEUE_TIMEOUT = int(os.getenv("LLM_QUEUE_TIMEOUT", 5))
+
+    # AI tutor response cache: size, TTL (seconds) and optional near-duplicate matching
+    CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", 1024))
+    CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", 3600))
+    CHAT_CACHE_NEAR_DUPLICATES = os.getenv("CHAT_CACHE_NEAR_DUPLICATES", "false").lower() == "true"
+    CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", 0.8))
+
+    # AI tutor retrieval: on-disk lesson index, chunking and chunks injected per question
+    LESSON_INDEX_PATH = os.getenv("LESSON_INDEX_PATH", os.path.abspath("lesson_index.sqlite3"))
+    LESSON_CHUNK_WORDS = int(os.getenv("LESSON_CHUNK_WORDS", 120))
+    LESSON_CHUNK_OVERLAP = int(os.getenv("LESSON_CHUNK_OVERLAP", 20))
+    CHAT_CONTEXT_CHUNKS = int(os.getenv("CHAT_CONTEXT_CHUNKS", 3))
+
+    # Sessions: "cookie" keeps Flask's signed cookie; memory | sqlite | redis
+    # store the data server-side behind an opaque id (memory = single worker)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cookie")
+    SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", os.path.abspath("sessions.sqlite3"))
+    SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+
+    # Compiled exam answer keys kept per process (LRU by exam)
+    ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", 512))
+
+    # Exam grading: "sync" scores on the request thread; "queued" stores the
+    # answers, returns 202 and leaves scoring to batch graders
+    EXAM_GRADING_MODE = os.getenv("EXAM_GRADING_MODE", "sync")
+    EXAM_GRADER_THREADS = os.getenv("EXAM_GRADER_THREADS", "true").lower() == "true"
+    EXAM_GRADER_WORKERS = int(os.getenv("EXAM_GRADER_WORKERS", 2))
+    EXAM_GRADING_BATCH = int(os.getenv("EXAM_GRADING_BATCH", 100))
+    EXAM_GRADER_POLL_SECONDS = int(os.getenv("EXAM_GRADER_POLL_SECONDS", 5))
+
+    # Exam time limits: a scheduler thread (started with the app, one active
+    # per deployment via a pg advisory lock) closes attempts at their deadline;
+    # submissions later than deadline + grace are refused
+    EXAM_DEADLINE_SCHEDULER = os.getenv("EXAM_DEADLINE_SCHEDULER", "true").lower() == "true"
+    EXAM_DEADLINE_POLL_SECONDS = int(os.getenv("EXAM_DEADLINE_POLL_SECONDS", 15))
+    EXAM_DEADLINE_BATCH = int(os.getenv("EXAM_DEADLINE_BATCH", 200))
+    EXAM_SUBMIT_GRACE_SECONDS = int(os.getenv("EXAM_SUBMIT_GRACE_SECONDS", 30))
+
+    # Exam answer autosave: 0 writes each save as it arrives; > 0 coalesces deltas
+    # in process memory for this long (single worker only, like memory sessions)
+    AUTOSAVE_FLUSH_SECONDS = float(os.getenv("AUTOSAVE_FLUSH_SECONDS", 0))
+
+    # Rate limiting: counters must be shared by all workers in production,
+    # e.g. redis://host:6379 (needs the redis package), sql+postgresql://...
+    # or sql+sqlite:////var/lib/neura/limits.sqlite3 for a single host
+    RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+    RATELIMIT_STRATEGY = os.getenv("RATELIMIT_STRATEGY", "moving-window")
+    RATELIMIT_HEADERS_ENABLED = True
+    # per-client limits for expensive routes, each counted separately
+    RATELIMIT_ROUTE_LIMITS = {
+        "chat": os.getenv("RATELIMIT_CHAT", "20/minute"),
+        "login": os.getenv("RATELIMIT_LOGIN", "10/minute"),
+        "exam_submit": os.getenv("RATELIMIT_EXAM_SUBMIT", "25/minute"),
+    }
+
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
@@ -73,3 +177,11 @@ class ProductionConfig(BaseConfig):
 
 class TestingConfig(BaseConfig):
     TESTING = True
+    EMAIL_TRANSPORT = "file"
+    EMAIL_DISPATCHER_THREAD = False
+    MEDIA_STORAGE = "local"
+    LLM_BACKEND = "fake"
+    RATELIMIT_STORAGE_URI = "memory://"
+    EXAM_GRADER_THREADS = False
+    AUTOSAVE_FLUSH_SECONDS = 0
+    EXAM_DEADLINE_SCHEDULER = False
@@ -1,3 +1,4 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_mail import Mail
@@ -5,6 +6,8 @@ from flask_limiter import Limiter
 from flask_login import LoginManager
 from flask_limiter.util import get_remote_address
 from argon2 import PasswordHasher
+# registers the sql+sqlite / sql+postgresql RATELIMIT_STORAGE_URI schemes
+from app.utils import ratelimit_storage  # noqa: F401
 from flask_cors import CORS
 
 
@@ -13,11 +16,13 @@ migrate = Migrate()
 mail = Mail()
 login_manager = LoginManager()
 cors = CORS()
+# cost parameters can be tuned per deployment; older hashes are upgraded on login
 ph = PasswordHasher(
-    time_cost=2,
-    memory_cost=102400 ,
-    parallelism=8
+    time_cost=int(os.getenv("ARGON2_TIME_COST", 2)),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", 102400)),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", 8))
 )
+# storage and strategy come from RATELIMIT_STORAGE_URI / RATELIMIT_STRATEGY
 limiter = Limiter(
     key_func=get_remote_address , 
     default_limits= ["200 per hour"]
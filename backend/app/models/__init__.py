@@ -1,15 +1,19 @@
 from .user import User
-from .student import StudentProfile
+from .student import StudentProfile, StudentScore
 from .teacher import TeacherProfile
 from .parent import ParentProfile, ParentStudentLink
 from .admin import AdminAccess
 from .course import Course, CourseEnrollment, Lesson, Chapter, LessonComment, CourseRating, Exam, ExamQuestion, ExamAttempt, LessonCompletion
+from .course_stats import CourseStats
 from .id_sequence import IDSequence
+from .email_outbox import EmailOutbox
+from .upload_job import UploadJob
 
 # Expose model classes for convenient imports
 __all__ = [
     "User",
     "StudentProfile",
+    "StudentScore",
     "TeacherProfile",
     "ParentProfile",
     "ParentStudentLink",
@@ -24,5 +28,8 @@ __all__ = [
     "Exam",
     "ExamQuestion",
     "ExamAttempt",
-    "IDSequence"
+    "CourseStats",
+    "IDSequence",
+    "EmailOutbox",
+    "UploadJob"
 ]
@@ -1,6 +1,7 @@
 from app.extensions import db
 import uuid
-from sqlalchemy.dialects.postgresql import UUID , JSONB
+from sqlalchemy import and_, false, func, select, update
+from sqlalchemy.dialects.postgresql import UUID , JSONB , insert as pg_insert
 
 
 
@@ -36,15 +37,33 @@ class CourseEnrollment(db.Model):
     enrolled_at = db.Column(db.DateTime, default=db.func.now())
     progress_percent = db.Column(db.Float, default=0.0)
     completed = db.Column(db.Boolean, default=False)
+    completed_lessons = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # Indexes for fast lookups
     __table_args__ = (
         db.Index('idx_course_enrollments_course_id', 'course_id'),
         db.Index('idx_course_enrollments_student_id', 'student_id'),
+        # Keyset pagination of a course roster
+        db.Index('idx_course_enrollments_course_enrolled', 'course_id', 'enrolled_at', 'id'),
+        db.Index('idx_course_enrollments_course_progress', 'course_id', 'progress_percent', 'id'),
     )
     # Relationship to Course for convenience
     course = db.relationship("Course", backref=db.backref("enrollments", lazy="dynamic"))
 
+    def progress_of(self, lesson_count):
+        """Completion percentage against the course's current lesson total."""
+        if not lesson_count:
+            return 0
+        return int(min((self.completed_lessons or 0) / lesson_count * 100, 100))
+
+    @staticmethod
+    def progress_expression(done, total):
+        return func.coalesce(func.least(done * 100.0 / func.nullif(total, 0), 100.0), 0.0)
+
+    @staticmethod
+    def completed_expression(done, total):
+        return func.coalesce(and_(total > 0, done >= total), false())
+
 
 # ------------------------
 # Ratings
@@ -63,7 +82,7 @@ class CourseRating(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("course_id", "student_id", name="uq_course_student_rating"),
-        db.Index('idx_course_ratings_course_id', 'course_id'),
+        db.Index('idx_course_ratings_course_created', 'course_id', 'created_at'),
     )
 
 
@@ -117,31 +136,41 @@ class Lesson(db.Model):
         return bool(rc)
 
     def mark_completed(self, student_id):
-        """Create a completion record for the student if it doesn't exist and update enrollment progress."""
-        existing = LessonCompletion.query.filter_by(lesson_id=self.id, student_id=student_id).first()
-        if existing:
-            return existing
-
-        lc = LessonCompletion(lesson_id=self.id, student_id=student_id)
-        db.session.add(lc)
-
-        # Update course enrollment progress
-        course_id = self.chapter.course_id
-        enrollment = CourseEnrollment.query.filter_by(student_id=student_id, course_id=course_id).first()
-        if enrollment:
-            # recompute completed lessons for course
-            total_lessons = 0
-            completed = 0
-            for ch in Course.query.get(course_id).chapters:
-                for l in ch.lessons:
-                    total_lessons += 1
-                    if LessonCompletion.query.filter_by(lesson_id=l.id, student_id=student_id).first():
-                        completed += 1
-
-            enrollment.progress_percent = (completed / total_lessons * 100) if total_lessons > 0 else 0
-            enrollment.completed = enrollment.progress_percent >= 100
-
-        return lc
+        """Record a completion for the student and bump their enrollment progress.
+
+        Costs two statements regardless of course size: an idempotent insert
+        into lesson_completions and one atomic counter update on the
+        enrollment. Returns False if the lesson was already completed.
+        """
+        from .course_stats import CourseStats  # avoid circular import
+
+        inserted = db.session.execute(
+            pg_insert(LessonCompletion.__table__)
+            .values(id=uuid.uuid4(), lesson_id=self.id, student_id=student_id)
+            .on_conflict_do_nothing(index_elements=["lesson_id", "student_id"])
+            .returning(LessonCompletion.__table__.c.id)
+        ).scalar()
+        if inserted is None:
+            return False
+
+        course_id = select(Chapter.course_id).where(Chapter.id == self.chapter_id).scalar_subquery()
+        total = select(CourseStats.lesson_count).where(CourseStats.course_id == course_id).scalar_subquery()
+        done = CourseEnrollment.completed_lessons + 1
+
+        db.session.execute(
+            update(CourseEnrollment)
+            .where(
+                CourseEnrollment.student_id == student_id,
+                CourseEnrollment.course_id == course_id,
+            )
+            .values(
+                completed_lessons=done,
+                progress_percent=CourseEnrollment.progress_expression(done, total),
+                completed=CourseEnrollment.completed_expression(done, total),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return True
 
 
 # ------------------------
@@ -162,7 +191,7 @@ class LessonComment(db.Model):
 
     # Index for performance
     __table_args__ = (
-        db.Index('idx_lesson_comments_lesson_id', 'lesson_id'),
+        db.Index('idx_lesson_comments_lesson_created', 'lesson_id', 'created_at'),
     )
 
 
@@ -180,6 +209,7 @@ class LessonCompletion(db.Model):
     lesson = db.relationship("Lesson", backref=db.backref("completions", lazy="dynamic"))
 
     __table_args__ = (
+        db.UniqueConstraint("lesson_id", "student_id", name="uq_lesson_completion_student"),
         db.Index('idx_lesson_completions_lesson_id', 'lesson_id'),
         db.Index('idx_lesson_completions_student_id', 'student_id'),
     )
@@ -198,7 +228,9 @@ class Exam(db.Model):
     description = db.Column(db.Text)
     time_limit = db.Column(db.Integer, nullable=False)  # minutes
     passing_score = db.Column(db.Float, default=60.0)  # percentage
-    total_points = db.Column(db.Float, default=100.0)
+    # maintained by the question endpoints: count and sum of question points
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_points = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
 
     status = db.Column(db.Enum("draft", "published", "archived", name="exam_status"), default="draft")
     created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -208,7 +240,7 @@ class Exam(db.Model):
     teacher = db.relationship("TeacherProfile", backref=db.backref("exams", lazy="dynamic"))
 
     __table_args__ = (
-        db.Index('idx_exams_course_id', 'course_id'),
+        db.Index('idx_exams_course_status', 'course_id', 'status'),
         db.Index('idx_exams_teacher_id', 'teacher_id'),
     )
 
@@ -251,9 +283,13 @@ class ExamAttempt(db.Model):
 
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=True)
+    deadline_at = db.Column(db.DateTime, nullable=True)  # start_time + exam time_limit
     score = db.Column(db.Float, nullable=True)
     passed = db.Column(db.Boolean, nullable=True)
     answers = db.Column(JSONB, default={})  # {question_id: answer_text}
+    # None while in progress; "pending" once submitted in queued mode, "graded"
+    # when scored, "error" if the grader could not score it
+    grading_status = db.Column(db.String(20), nullable=True)
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
@@ -262,4 +298,6 @@ class ExamAttempt(db.Model):
     __table_args__ = (
         db.Index('idx_exam_attempts_exam_id', 'exam_id'),
         db.Index('idx_exam_attempts_student_id', 'student_id'),
+        db.Index('idx_exam_attempts_grading_pending', 'end_time', postgresql_where=db.text("grading_status = 'pending'")),
+        db.Index('idx_exam_attempts_open_deadline', 'deadline_at', postgresql_where=db.text("end_time IS NULL")),
     )
\ No newline at end of file
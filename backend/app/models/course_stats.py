@@ -0,0 +1,231 @@
+from app.extensions import db
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.orm.attributes import get_history
+from .course import Course, CourseEnrollment, CourseRating, Chapter, Lesson, LessonCompletion
+
+
+# ------------------------
+# Course Stats (denormalized, maintained on write)
+# ------------------------
+class CourseStats(db.Model):
+    __tablename__ = "course_stats"
+
+    course_id = db.Column(UUID(as_uuid=True), db.ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    chapter_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    lesson_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # star histogram: number of ratings with each score
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    course = db.relationship("Course", backref=db.backref("stats", uselist=False))
+
+    @property
+    def average_rating(self):
+        return (self.rating_sum / self.rating_count) if self.rating_count else 0.0
+
+    @property
+    def rating_distribution(self):
+        return {str(star): getattr(self, f"rating_{star}") or 0 for star in STARS}
+
+
+STARS = range(1, 6)
+HISTOGRAM_COLUMNS = tuple(f"rating_{star}" for star in STARS)
+COUNTER_COLUMNS = ("rating_sum", "rating_count", "enrollment_count", "chapter_count", "lesson_count", *HISTOGRAM_COLUMNS)
+
+
+def rating_distribution(stats):
+    """1-5 star counts for a course; stats may be None (no ratings yet)."""
+    return stats.rating_distribution if stats else {str(star): 0 for star in STARS}
+
+
+def bump_course_stats(connection, course_id, **deltas):
+    """Atomically add deltas to a course's counters, creating the row if needed.
+
+    course_id may also be a scalar subquery (e.g. a lesson's chapter -> course).
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas or course_id is None:
+        return
+
+    table = CourseStats.__table__
+    stmt = pg_insert(table).values(course_id=course_id, **deltas)
+    set_ = {k: table.c[k] + stmt.excluded[k] for k in deltas}
+    set_["updated_at"] = func.now()
+    connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.course_id], set_=set_))
+
+
+# ------------------------
+# Write hooks
+# ------------------------
+@event.listens_for(CourseRating, "after_insert")
+def _rating_inserted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, rating_sum=target.rating, rating_count=1, **{f"rating_{target.rating}": 1})
+
+
+@event.listens_for(CourseRating, "after_update")
+def _rating_updated(mapper, connection, target):
+    hist = get_history(target, "rating")
+    if not hist.has_changes():
+        return
+    old = (hist.deleted[0] if hist.deleted else 0) or 0
+    deltas = {f"rating_{target.rating}": 1}
+    if old:
+        deltas[f"rating_{old}"] = -1
+    bump_course_stats(connection, target.course_id, rating_sum=target.rating - old, **deltas)
+
+
+@event.listens_for(CourseRating, "after_delete")
+def _rating_deleted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, rating_sum=-target.rating, rating_count=-1, **{f"rating_{target.rating}": -1})
+
+
+@event.listens_for(CourseEnrollment, "after_insert")
+def _enrollment_inserted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, enrollment_count=1)
+
+
+@event.listens_for(CourseEnrollment, "after_delete")
+def _enrollment_deleted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, enrollment_count=-1)
+
+
+@event.listens_for(Chapter, "after_insert")
+def _chapter_inserted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, chapter_count=1)
+
+
+@event.listens_for(Chapter, "after_delete")
+def _chapter_deleted(mapper, connection, target):
+    bump_course_stats(connection, target.course_id, chapter_count=-1)
+
+
+def _course_of_chapter(chapter_id):
+    return select(Chapter.course_id).where(Chapter.id == chapter_id).scalar_subquery()
+
+
+def _rescale_progress(connection, course_id):
+    # lesson_count moved: re-derive every enrollment's stored percentage so
+    # analytics and the roster agree with what students see
+    total = select(CourseStats.lesson_count).where(CourseStats.course_id == course_id).scalar_subquery()
+    connection.execute(
+        update(CourseEnrollment)
+        .where(CourseEnrollment.course_id == course_id)
+        .values(
+            progress_percent=CourseEnrollment.progress_expression(CourseEnrollment.completed_lessons, total),
+            completed=CourseEnrollment.completed_expression(CourseEnrollment.completed_lessons, total),
+        )
+    )
+
+
+@event.listens_for(Lesson, "after_insert")
+def _lesson_inserted(mapper, connection, target):
+    course_id = _course_of_chapter(target.chapter_id)
+    bump_course_stats(connection, course_id, lesson_count=1)
+    _rescale_progress(connection, course_id)
+
+
+@event.listens_for(Lesson, "after_delete")
+def _lesson_deleted(mapper, connection, target):
+    course_id = _course_of_chapter(target.chapter_id)
+    bump_course_stats(connection, course_id, lesson_count=-1)
+    _rescale_progress(connection, course_id)
+
+
+# ------------------------
+# Backfill / reconcile
+# ------------------------
+def _count_by_course(column, *aggregates):
+    return (
+        select(column.label("course_id"), *aggregates)
+        .group_by(column)
+        .subquery()
+    )
+
+
+def reconcile_course_stats():
+    """Recompute every course's counters from the source tables.
+
+    Used to backfill the table and to repair drift from writes that bypass
+    the ORM (bulk operations, manual SQL). Returns the number of courses.
+    """
+    ratings = _count_by_course(
+        CourseRating.course_id,
+        func.sum(CourseRating.rating).label("rating_sum"),
+        func.count(CourseRating.id).label("rating_count"),
+        *(func.count(CourseRating.id).filter(CourseRating.rating == star).label(f"rating_{star}") for star in STARS),
+    )
+    enrollments = _count_by_course(CourseEnrollment.course_id, func.count(CourseEnrollment.id).label("enrollment_count"))
+    chapters = _count_by_course(Chapter.course_id, func.count(Chapter.id).label("chapter_count"))
+    lessons = (
+        select(Chapter.course_id.label("course_id"), func.count(Lesson.id).label("lesson_count"))
+        .join(Lesson, Lesson.chapter_id == Chapter.id)
+        .group_by(Chapter.course_id)
+        .subquery()
+    )
+
+    source = (
+        select(
+            Course.id,
+            func.coalesce(ratings.c.rating_sum, 0),
+            func.coalesce(ratings.c.rating_count, 0),
+            func.coalesce(enrollments.c.enrollment_count, 0),
+            func.coalesce(chapters.c.chapter_count, 0),
+            func.coalesce(lessons.c.lesson_count, 0),
+            *(func.coalesce(ratings.c[column], 0) for column in HISTOGRAM_COLUMNS),
+        )
+        .outerjoin(ratings, ratings.c.course_id == Course.id)
+        .outerjoin(enrollments, enrollments.c.course_id == Course.id)
+        .outerjoin(chapters, chapters.c.course_id == Course.id)
+        .outerjoin(lessons, lessons.c.course_id == Course.id)
+    )
+
+    table = CourseStats.__table__
+    stmt = pg_insert(table).from_select(["course_id", *COUNTER_COLUMNS], source)
+    set_ = {k: stmt.excluded[k] for k in COUNTER_COLUMNS}
+    set_["updated_at"] = func.now()
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[table.c.course_id], set_=set_))
+    db.session.commit()
+
+    return db.session.query(func.count(CourseStats.course_id)).scalar()
+
+
+def reconcile_enrollment_progress():
+    """Recompute completed_lessons / progress_percent for every enrollment."""
+    completed = (
+        select(func.count(LessonCompletion.id))
+        .join(Lesson, Lesson.id == LessonCompletion.lesson_id)
+        .join(Chapter, Chapter.id == Lesson.chapter_id)
+        .where(
+            Chapter.course_id == CourseEnrollment.course_id,
+            LessonCompletion.student_id == CourseEnrollment.student_id,
+        )
+        .scalar_subquery()
+    )
+    total = (
+        select(CourseStats.lesson_count)
+        .where(CourseStats.course_id == CourseEnrollment.course_id)
+        .scalar_subquery()
+    )
+
+    result = db.session.execute(
+        update(CourseEnrollment)
+        .values(
+            completed_lessons=completed,
+            progress_percent=CourseEnrollment.progress_expression(completed, total),
+            completed=CourseEnrollment.completed_expression(completed, total),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,34 @@
+from app.extensions import db
+import uuid
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# ------------------------
+# Email Outbox (enqueued by requests, delivered by the dispatcher)
+# ------------------------
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+
+    STATUSES = ("pending", "sent", "failed")
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="pending", server_default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now())
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_email_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox id={self.id} to={self.to_email} status={self.status}>"
@@ -50,3 +50,19 @@ class StudentProfile(db.Model):
             "bio": self.bio,
             "joined_at": self.joined_at.isoformat() if self.joined_at is not None else None,
         }
+
+
+class StudentScore(db.Model):
+    """Per-student exam score aggregate with a materialized global rank."""
+    __tablename__ = "student_scores"
+
+    student_id = db.Column(UUID(as_uuid=True), db.ForeignKey("student_profiles.id", ondelete="CASCADE"), primary_key=True)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    scored_attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    avg_score = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    rank = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    __table_args__ = (
+        db.Index('idx_student_scores_avg_score', 'avg_score'),
+    )
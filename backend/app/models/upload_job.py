@@ -0,0 +1,45 @@
+from app.extensions import db
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# ------------------------
+# Upload Job (spooled media waiting to be pushed to storage)
+# ------------------------
+class UploadJob(db.Model):
+    __tablename__ = "upload_jobs"
+
+    STATUSES = ("pending", "processing", "done", "failed")
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    kind = db.Column(db.String(30), nullable=False)  # student_avatar | course_thumbnail
+    target_id = db.Column(UUID(as_uuid=True), nullable=False)
+    spool_path = db.Column(db.Text, nullable=False)
+    public_id = db.Column(db.String(255), nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="pending", server_default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    result_url = db.Column(db.Text, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    __table_args__ = (
+        db.Index('idx_upload_jobs_status', 'status'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "url": self.result_url,
+            "error": self.last_error if self.status == "failed" else None
+        }
+
+    def __repr__(self):
+        return f"<UploadJob id={self.id} kind={self.kind} status={self.status}>"
@@ -0,0 +1,89 @@
+import threading
+from collections import namedtuple
+
+from cachetools import LRUCache
+from flask import current_app
+
+from app.extensions import db
+from app.models import ExamQuestion
+
+
+# One exam's grading data, compiled once. Parallel tuples, in question order;
+# answers are pre-normalized (None for essays, which are never auto-scored).
+AnswerKey = namedtuple("AnswerKey", "version question_ids types points answers total_points")
+
+_lock = threading.Lock()
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = LRUCache(maxsize=current_app.config.get("ANSWER_KEY_CACHE_SIZE", 512))
+    return _cache
+
+
+def _normalize(question_type, answer):
+    if question_type == "short_answer":
+        return answer.strip().lower()
+    if question_type == "multiple_choice":
+        return answer
+    return None
+
+
+def compile_answer_key(exam_id, version=None):
+    rows = (
+        db.session.query(ExamQuestion.id, ExamQuestion.question_type, ExamQuestion.points, ExamQuestion.correct_answer)
+        .filter(ExamQuestion.exam_id == exam_id)
+        .order_by(ExamQuestion.order)
+        .all()
+    )
+    points = tuple(float(r.points or 0) for r in rows)
+    return AnswerKey(
+        version=version,
+        question_ids=tuple(str(r.id) for r in rows),
+        types=tuple(r.question_type for r in rows),
+        points=points,
+        answers=tuple(_normalize(r.question_type, r.correct_answer or "") for r in rows),
+        total_points=sum(points)
+    )
+
+
+def get_answer_key(exam):
+    """Cached key for exam; recompiled when exam.updated_at moves.
+
+    Question and exam edits bump updated_at, so other workers notice the
+    change on their next submission even without invalidate_answer_key.
+    """
+    cache = _get_cache()
+    with _lock:
+        key = cache.get(exam.id)
+    if key is not None and key.version == exam.updated_at:
+        return key
+
+    key = compile_answer_key(exam.id, exam.updated_at)
+    with _lock:
+        cache[exam.id] = key
+    return key
+
+
+def invalidate_answer_key(exam_id):
+    with _lock:
+        if _cache is not None:
+            _cache.pop(exam_id, None)
+
+
+def grade(key, answers):
+    """Percentage score for an {question_id: answer} map; a pure in-memory pass."""
+    earned = 0.0
+    for question_id, question_type, points, expected in zip(key.question_ids, key.types, key.points, key.answers):
+        given = answers.get(question_id)
+        if not given or expected is None or not isinstance(given, str):
+            continue
+        if question_type == "short_answer":
+            given = given.strip().lower()
+        if given == expected:
+            earned += points
+    return (earned / key.total_points * 100) if key.total_points else 0
@@ -0,0 +1,105 @@
+import atexit
+import threading
+
+from flask import current_app
+from sqlalchemy import bindparam, cast, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.extensions import db
+from app.models import ExamAttempt
+
+
+_lock = threading.Lock()
+_pending = {}  # attempt_id -> {question_id: answer}, newest value wins
+_timer = None
+_app = None
+
+
+def queue_answers(attempt_id, delta):
+    """Save per-question answers, now or within AUTOSAVE_FLUSH_SECONDS.
+
+    With a window, saves for the same attempt inside it collapse into one
+    write. The buffer is process-local: submit only flushes the worker it
+    lands on, and another worker's deltas are dropped once the attempt is
+    closed. Only set a window with a single worker; the default (0) writes
+    every save immediately.
+
+    Returns False if the save was written and found the attempt already
+    closed; buffered saves always return True.
+    """
+    global _timer, _app
+    window = current_app.config.get("AUTOSAVE_FLUSH_SECONDS", 0)
+    with _lock:
+        _pending.setdefault(attempt_id, {}).update(delta)
+        if window > 0 and _timer is None:
+            _app = current_app._get_current_object()
+            _timer = threading.Timer(window, _flush_in_background, args=(_app,))
+            _timer.daemon = True
+            _timer.start()
+
+    if window <= 0:
+        return flush_answers(attempt_id) > 0
+    return True
+
+
+def pending_answers(attempt_id):
+    with _lock:
+        return dict(_pending.get(attempt_id, {}))
+
+
+def flush_answers(*attempt_ids):
+    """Write buffered answers (all attempts, or just attempt_ids) as jsonb || patches.
+
+    One executemany UPDATE per flush; only the changed keys travel to the
+    database, and closed attempts are left untouched. Returns the number of
+    attempts written (as counted by the driver for multi-attempt flushes).
+    """
+    global _pending
+    with _lock:
+        if not attempt_ids:
+            batch, _pending = _pending, {}
+        else:
+            batch = {key: _pending.pop(key) for key in attempt_ids if key in _pending}
+    if not batch:
+        return 0
+
+    table = ExamAttempt.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("attempt_id"), table.c.end_time.is_(None))
+        .values(answers=func.coalesce(table.c.answers, cast("{}", JSONB)).op("||")(bindparam("delta", type_=JSONB)))
+    )
+    try:
+        written = db.session.execute(stmt, [{"attempt_id": key, "delta": delta} for key, delta in batch.items()]).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _requeue(batch)
+        raise
+    return written
+
+
+def _requeue(batch):
+    # answers saved since the failed flush are newer; keep them
+    with _lock:
+        for attempt_id, delta in batch.items():
+            _pending[attempt_id] = {**delta, **_pending.get(attempt_id, {})}
+
+
+def _flush_in_background(app):
+    global _timer
+    with _lock:
+        _timer = None
+    with app.app_context():
+        try:
+            flush_answers()
+        except Exception as e:
+            app.logger.error(f"[AUTOSAVE] flush failed, will retry with the next save: {e}")
+        finally:
+            db.session.remove()
+
+
+@atexit.register
+def _flush_on_exit():
+    if _app is not None and _pending:
+        _flush_in_background(_app)
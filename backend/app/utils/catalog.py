@@ -0,0 +1,140 @@
+from app.extensions import db
+from app.models import Course, CourseStats, TeacherProfile, User, Chapter, Lesson, LessonCompletion
+from sqlalchemy.orm import joinedload
+
+
+MAX_PER_PAGE = 100
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def teacher_display_name(platform_name, username):
+    """Name shown for a course's instructor."""
+    return platform_name or username or "Instructor"
+
+
+def course_with_teacher():
+    """Course query that eager-loads the teacher and their user row."""
+    return Course.query.options(joinedload(Course.teacher).joinedload(TeacherProfile.user))
+
+
+def course_teacher_name(course):
+    teacher = course.teacher
+    if not teacher:
+        return teacher_display_name(None, None)
+    return teacher_display_name(teacher.platform_name, teacher.user.username if teacher.user else None)
+
+
+# ============================================================
+# Catalog page
+# ============================================================
+
+def load_catalog_page(page=1, per_page=12):
+    """Return (courses, total, pages) for one page of published courses.
+
+    Ratings, review/enrollment/chapter counts come from the course_stats
+    row and the teacher name from a join, so a page is one count query plus
+    one primary-key join regardless of per_page.
+    """
+    page = max(page or 1, 1)
+    per_page = min(max(per_page or 12, 1), MAX_PER_PAGE)
+
+    published = Course.query.filter(Course.status == "published")
+    total = published.order_by(None).count()
+
+    rows = (
+        published.with_entities(
+            Course,
+            TeacherProfile.platform_name,
+            User.username,
+            CourseStats,
+        )
+        .outerjoin(TeacherProfile, TeacherProfile.id == Course.teacher_id)
+        .outerjoin(User, User.id == TeacherProfile.user_id)
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .order_by(Course.created_at.desc(), Course.id)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+
+    courses = [
+        {
+            "id": str(c.id),
+            "title": c.title,
+            "description": c.description,
+            "price": float(c.price) if c.price else 0,
+            "thumbnail": c.thumbnail_url or None,
+            "teacher_name": teacher_display_name(platform_name, username),
+            "rating": float(stats.average_rating) if stats else 0.0,
+            "review_count": stats.rating_count if stats else 0,
+            "enrolled_count": stats.enrollment_count if stats else 0,
+            "chapter_count": stats.chapter_count if stats else 0,
+            "created_at": c.created_at.isoformat() if c.created_at else None
+        }
+        for c, platform_name, username, stats in rows
+    ]
+
+    pages = (total + per_page - 1) // per_page
+    return courses, total, pages
+
+
+# ============================================================
+# Course tree (chapters -> lessons -> completion)
+# ============================================================
+
+def load_course_tree(course_id, student_id=None):
+    """Return (chapters, total_lessons, completed_lessons) for a course.
+
+    Chapters, lessons and the student's completion set are fetched with
+    three queries and assembled in memory, so the cost does not grow with
+    the number of lessons.
+    """
+    chapters = (
+        Chapter.query
+        .filter(Chapter.course_id == course_id)
+        .order_by(Chapter.order, Chapter.id)
+        .all()
+    )
+    if not chapters:
+        return [], 0, 0
+
+    lessons = (
+        Lesson.query
+        .with_entities(Lesson.id, Lesson.chapter_id, Lesson.title, Lesson.order)
+        .filter(Lesson.chapter_id.in_([ch.id for ch in chapters]))
+        .order_by(Lesson.order, Lesson.id)
+        .all()
+    )
+
+    completed_ids = set()
+    if student_id is not None and lessons:
+        completed_ids = {
+            row.lesson_id
+            for row in db.session.query(LessonCompletion.lesson_id).filter(
+                LessonCompletion.student_id == student_id,
+                LessonCompletion.lesson_id.in_([l.id for l in lessons]),
+            )
+        }
+
+    by_chapter = {ch.id: [] for ch in chapters}
+    for l in lessons:
+        by_chapter[l.chapter_id].append({
+            "id": str(l.id),
+            "title": l.title,
+            "order": l.order,
+            "is_completed": l.id in completed_ids
+        })
+
+    chapters_data = [
+        {
+            "id": str(ch.id),
+            "title": ch.title,
+            "lessons": by_chapter[ch.id]
+        }
+        for ch in chapters
+    ]
+
+    return chapters_data, len(lessons), len(completed_ids)
@@ -0,0 +1,149 @@
+import hashlib
+import random
+import re
+import threading
+
+from cachetools import TTLCache
+from flask import current_app
+
+
+_WS = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?!.]+$")
+_ANCHORS = re.compile(r"\d+(?:[.,]\d+)*|[-+*/^=<>%√∑∫]")
+
+# MinHash / LSH parameters for the optional near-duplicate index
+SHINGLE_SIZE = 4
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [(random.Random(i).randrange(1, _PRIME), random.Random(-i - 1).randrange(_PRIME)) for i in range(NUM_HASHES)]
+
+
+def normalize_message(message):
+    return _TRAILING.sub("", _WS.sub(" ", message.strip().lower()))
+
+
+def _digest(*parts):
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _anchors(text):
+    # numbers and operators must match exactly: "x^2" and "x^3" shingle alike
+    return tuple(_ANCHORS.findall(text))
+
+
+def _signature(text):
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class ChatResponseCache:
+    """LRU/TTL cache of tutor answers.
+
+    Exact hits are keyed by sha256(model, system prompt hash, context, normalized
+    message). With near_duplicates enabled, misses fall back to a MinHash/LSH
+    index over character shingles and accept a cached answer whose estimated
+    Jaccard similarity is at least `similarity` within the same scope and
+    whose numbers and operators are exactly the same.
+    """
+
+    def __init__(self, maxsize, ttl, near_duplicates=False, similarity=0.8):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)  # key -> (answer, scope, signature, anchors)
+        self.buckets = {}  # (scope, band, band hash) -> set of keys
+        self.near_duplicates = near_duplicates
+        self.similarity = similarity
+        self.counters = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+        self._lock = threading.Lock()
+
+    def _bands(self, scope, signature):
+        for b in range(BANDS):
+            yield (scope, b, signature[b * ROWS:(b + 1) * ROWS])
+
+    def get(self, scope, message):
+        text = normalize_message(message)
+        key = _digest(scope, text)
+        signature = _signature(text) if self.near_duplicates else None
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.counters["hits"] += 1
+                return entry[0]
+            if signature is not None:
+                answer = self._near_match(scope, signature, _anchors(text))
+                if answer is not None:
+                    self.counters["near_hits"] += 1
+                    return answer
+            self.counters["misses"] += 1
+            return None
+
+    def _near_match(self, scope, signature, anchors):
+        best, best_score = None, self.similarity
+        for band in self._bands(scope, signature):
+            for key in list(self.buckets.get(band, ())):
+                entry = self.entries.get(key)
+                if entry is None:
+                    self.buckets[band].discard(key)  # expired or evicted
+                    continue
+                if entry[3] != anchors:
+                    continue
+                score = sum(a == b for a, b in zip(signature, entry[2])) / NUM_HASHES
+                if score >= best_score:
+                    best, best_score = entry[0], score
+        return best
+
+    def put(self, scope, message, answer):
+        text = normalize_message(message)
+        key = _digest(scope, text)
+        signature = _signature(text) if self.near_duplicates else None
+        with self._lock:
+            self.entries[key] = (answer, scope, signature, _anchors(text))
+            self.counters["stores"] += 1
+            if signature is not None:
+                for band in self._bands(scope, signature):
+                    self.buckets.setdefault(band, set()).add(key)
+                if len(self.buckets) > BANDS * self.entries.maxsize * 2:
+                    self._rebuild_buckets()
+
+    def _rebuild_buckets(self):
+        self.buckets = {}
+        for key, (_, scope, signature, _) in list(self.entries.items()):
+            if signature is not None:
+                for band in self._bands(scope, signature):
+                    self.buckets.setdefault(band, set()).add(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["near_hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "size": len(self.entries),
+                "maxsize": self.entries.maxsize,
+                "hit_rate": round((self.counters["hits"] + self.counters["near_hits"]) / lookups, 4) if lookups else 0.0
+            }
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_chat_cache():
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = ChatResponseCache(
+                    maxsize=config.get("CHAT_CACHE_SIZE", 1024),
+                    ttl=config.get("CHAT_CACHE_TTL", 3600),
+                    near_duplicates=config.get("CHAT_CACHE_NEAR_DUPLICATES", False),
+                    similarity=config.get("CHAT_CACHE_SIMILARITY", 0.8)
+                )
+    return _cache
+
+
+def cache_scope(model, system_prompt, context=""):
+    """Everything besides the message that determines the answer."""
+    return _digest(model, hashlib.sha256(system_prompt.encode()).hexdigest(), context)
@@ -2,7 +2,6 @@ import cloudinary
 import cloudinary.uploader
 import os 
 from dotenv import load_dotenv
-from flask import jsonify
 
 load_dotenv()
 
@@ -25,7 +24,8 @@ def upload_profile(file , public_id):
         return result["secure_url"]
 
     except Exception as e:
-        return jsonify(e)
+        # Return None on failure (caller should handle)
+        return None
 
 
 def upload_image(file, public_id=None, folder="course_thumbnails", width=None, height=None):
@@ -1,6 +1,7 @@
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, current_app
 from flask_login import current_user
+from app.extensions import limiter
 
 def roles_required(*roles):
     def wrapper(fn):
@@ -12,4 +13,14 @@ def roles_required(*roles):
                 return jsonify({"message" : "Permission denied"}) , 403
             return fn(*args , **kwargs)
         return decorators_view
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def route_limit(route):
+    # RATELIMIT_ROUTE_LIMITS[route], counted per client in its own scope so
+    # one hot path (e.g. chat) can never use up another's (exam submission)
+    return limiter.shared_limit(
+        lambda: current_app.config["RATELIMIT_ROUTE_LIMITS"][route],
+        scope=route,
+        override_defaults=False
+    )
@@ -1,12 +1,7 @@
 from flask import current_app
 from itsdangerous import URLSafeTimedSerializer
 
-try:
-    from sendgrid import SendGridAPIClient
-    from sendgrid.helpers.mail import Mail as SGMail
-except ImportError:
-    SendGridAPIClient = None
-    SGMail = None
+from app.utils.mailer import enqueue_email
 
 
 # ============================================================
@@ -20,32 +15,12 @@ def get_serializer():
 
 
 # ============================================================
-# Internal SendGrid sender (DO NOT EXPORT)
+# Internal sender (DO NOT EXPORT)
 # ============================================================
 
 def _send_email(to_email: str, subject: str, html: str, text: str):
-    api_key = current_app.config.get("SENDGRID_API_KEY")
-    from_email = current_app.config.get("SENDGRID_FROM_EMAIL")
-
-    if not api_key:
-        raise RuntimeError("SENDGRID_API_KEY is not configured")
-
-    if not from_email:
-        raise RuntimeError("SENDGRID_FROM_EMAIL is not configured")
-
-    if not SendGridAPIClient or not SGMail:
-        raise RuntimeError("SendGrid SDK not installed")
-
-    message = SGMail(
-        from_email=from_email,
-        to_emails=to_email,
-        subject=subject,
-        html_content=html,
-        plain_text_content=text,
-    )
-
-    client = SendGridAPIClient(api_key)
-    client.send(message)
+    # Only enqueues; delivery happens in the outbox dispatcher (app/utils/mailer.py)
+    enqueue_email(to_email, subject, html, text)
 
 
 # ============================================================
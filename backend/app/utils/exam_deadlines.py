@@ -0,0 +1,174 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, text, update
+
+from app.extensions import db
+from app.models import ExamAttempt
+from app.utils.autosave import flush_answers
+from app.utils.grading import grade_pending, notify_graders
+
+
+_thread_lock = threading.Lock()
+_thread = None
+
+
+def remaining_seconds(attempt, now=None):
+    if attempt.end_time or attempt.deadline_at is None:
+        return None
+    return max(0, int((attempt.deadline_at - (now or datetime.utcnow())).total_seconds()))
+
+
+def _grace():
+    return timedelta(seconds=current_app.config.get("EXAM_SUBMIT_GRACE_SECONDS", 30))
+
+
+def is_expired(attempt, now=None):
+    """Open and past deadline + EXAM_SUBMIT_GRACE_SECONDS (network slack)."""
+    if attempt.end_time or attempt.deadline_at is None:
+        return False
+    return (now or datetime.utcnow()) > attempt.deadline_at + _grace()
+
+
+# ============================================================
+# Finalizing
+# ============================================================
+
+def finalize_attempts(attempt_ids):
+    """Close open attempts at their deadline with whatever was saved, then grade.
+
+    Idempotent: attempts already submitted (here or by another worker) are
+    skipped. Only these attempts are graded here; with EXAM_GRADING_MODE=queued
+    they join the queue like any other submission. Returns the number of
+    attempts closed.
+    """
+    if not attempt_ids:
+        return 0
+
+    flush_answers(*attempt_ids)
+    closed = db.session.execute(
+        update(ExamAttempt)
+        .where(ExamAttempt.id.in_(attempt_ids), ExamAttempt.end_time.is_(None))
+        .values(end_time=ExamAttempt.deadline_at, grading_status="pending")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if current_app.config.get("EXAM_GRADING_MODE") == "queued":
+        db.session.commit()
+        if closed:
+            notify_graders()
+        return closed
+
+    # sync: close and grade in one transaction, so a grading failure leaves
+    # the attempts open for the next pass instead of pending with no grader
+    grade_pending(batch_size=len(attempt_ids), attempt_ids=attempt_ids)
+    return closed
+
+
+def expire_overdue_attempts(batch_size=None):
+    """Close every open attempt past its deadline (partial index on deadline_at).
+
+    One scheduler pass; also `flask expire-exam-attempts` for cron.
+    """
+    batch_size = batch_size or current_app.config.get("EXAM_DEADLINE_BATCH", 200)
+    total = 0
+    while True:
+        ids = [
+            row.id for row in
+            db.session.query(ExamAttempt.id)
+            .filter(ExamAttempt.end_time.is_(None), ExamAttempt.deadline_at <= datetime.utcnow() - _grace())
+            .order_by(ExamAttempt.deadline_at)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return total
+        total += finalize_attempts(ids)
+        if len(ids) < batch_size:
+            return total
+
+
+# ============================================================
+# Scheduler: one per deployment, elected with a Postgres advisory lock
+# ============================================================
+
+SCHEDULER_LOCK_KEY = 720240  # pg_try_advisory_lock key held by the active scheduler
+
+
+def _acquire_leadership():
+    """A connection holding the scheduler lock, or None if another process has it.
+
+    Off Postgres (dev, tests) there is nothing to coordinate with; the
+    caller always leads.
+    """
+    conn = db.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    if db.engine.dialect.name != "postgresql":
+        return conn
+    if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}).scalar():
+        return conn
+    conn.close()
+    return None
+
+
+def _seconds_until_next_deadline(poll):
+    next_deadline = (
+        db.session.query(func.min(ExamAttempt.deadline_at))
+        .filter(ExamAttempt.end_time.is_(None))
+        .scalar()
+    )
+    if next_deadline is None:
+        return poll
+    due_in = (next_deadline + _grace() - datetime.utcnow()).total_seconds()
+    return min(poll, max(due_in, 1))
+
+
+def _lead(app, leader, poll):
+    while True:
+        leader.execute(text("SELECT 1"))  # raises once the lock's connection is gone
+        try:
+            expire_overdue_attempts()
+            wait = _seconds_until_next_deadline(poll)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"[DEADLINES] closing overdue attempts failed, retrying: {e}")
+            wait = poll
+        finally:
+            db.session.remove()
+        time.sleep(wait)
+
+
+def run_scheduler(app):
+    """Close attempts as their deadlines pass, forever.
+
+    Every process may run this; only the holder of the advisory lock does
+    the work, the rest wait to take over. New attempts are picked up within
+    EXAM_DEADLINE_POLL_SECONDS, and attempts left open across a restart on
+    the first pass.
+    """
+    with app.app_context():
+        poll = app.config.get("EXAM_DEADLINE_POLL_SECONDS", 15)
+        while True:
+            leader = None
+            try:
+                leader = _acquire_leadership()
+                if leader is not None:
+                    _lead(app, leader, poll)
+            except Exception as e:
+                app.logger.error(f"[DEADLINES] scheduler error: {e}")
+            finally:
+                if leader is not None:
+                    leader.invalidate()  # drops the pooled connection and the lock with it
+                db.session.remove()
+            time.sleep(poll)
+
+
+def start_scheduler(app):
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_scheduler, args=(app,), name="exam-deadlines", daemon=True)
+            _thread.start()
@@ -0,0 +1,139 @@
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Exam, ExamAttempt
+from app.utils.answer_keys import get_answer_key, grade
+from app.utils.leaderboard import bump_leaderboard_version
+from app.utils.ranking import record_exam_score
+
+
+_thread_lock = threading.Lock()
+_wake = threading.Event()
+_threads = []
+
+
+# ============================================================
+# Request path
+# ============================================================
+
+def enqueue_submission(attempt_id, answers):
+    """Store the raw answers and mark the attempt pending in one UPDATE.
+
+    Returns False if the attempt was already submitted.
+    """
+    claimed = db.session.execute(
+        update(ExamAttempt)
+        .where(ExamAttempt.id == attempt_id, ExamAttempt.end_time.is_(None))
+        .values(answers=answers, end_time=datetime.utcnow(), grading_status="pending")
+    ).rowcount
+    db.session.commit()
+
+    if claimed:
+        notify_graders()
+    return bool(claimed)
+
+
+def notify_graders():
+    """Wake this process's grader threads (EXAM_GRADER_THREADS), if any.
+
+    Without them pending attempts wait for `flask grade-submissions`.
+    """
+    if current_app.config.get("EXAM_GRADER_THREADS"):
+        start_graders(current_app._get_current_object())
+        _wake.set()
+
+
+def score_answers(exam, answers):
+    """(score percentage, passed) for an {question_id: answer} map."""
+    score = round(grade(get_answer_key(exam), answers or {}), 2)
+    return score, score >= exam.passing_score
+
+
+# ============================================================
+# Graders
+# ============================================================
+
+def grade_pending(batch_size=None, attempt_ids=None):
+    """Grade one batch of pending attempts and commit them together.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several graders
+    (threads, workers or the CLI) can run side by side. attempt_ids limits
+    the batch to those attempts. Attempts that fail to score are marked
+    grading_status='error' and left for a teacher to look at. Returns the
+    number of attempts processed.
+    """
+    batch_size = batch_size or current_app.config.get("EXAM_GRADING_BATCH", 100)
+
+    query = ExamAttempt.query.filter(ExamAttempt.grading_status == "pending")
+    if attempt_ids is not None:
+        query = query.filter(ExamAttempt.id.in_(attempt_ids))
+
+    batch = (
+        query
+        .order_by(ExamAttempt.end_time)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not batch:
+        db.session.rollback()
+        return 0
+
+    exams = {
+        exam.id: exam
+        for exam in Exam.query.filter(Exam.id.in_({attempt.exam_id for attempt in batch}))
+    }
+
+    rows = []
+    for attempt in batch:
+        # one bad attempt (e.g. a broken exam) must not wedge the whole queue
+        try:
+            score, passed = score_answers(exams[attempt.exam_id], attempt.answers)
+        except Exception as e:
+            current_app.logger.error(f"[GRADING] attempt {attempt.id} could not be graded: {e}")
+            rows.append({"id": attempt.id, "score": None, "passed": None, "grading_status": "error"})
+            continue
+        rows.append({"id": attempt.id, "score": score, "passed": passed, "grading_status": "graded"})
+        record_exam_score(attempt.student_id, score)
+
+    db.session.execute(update(ExamAttempt), rows)
+    db.session.commit()
+    bump_leaderboard_version()
+    return len(rows)
+
+
+def run_graders(app, once=False):
+    """Grade pending attempts until none are left (once) or forever."""
+    with app.app_context():
+        poll = app.config.get("EXAM_GRADER_POLL_SECONDS", 5)
+        while True:
+            _wake.clear()
+            try:
+                graded = grade_pending()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"[GRADING] grader error: {e}")
+                graded = 0
+            finally:
+                db.session.remove()
+
+            if graded:
+                continue
+            if once:
+                return
+            _wake.wait(poll)
+
+
+def start_graders(app):
+    if len(_threads) and all(t.is_alive() for t in _threads):
+        return
+    with _thread_lock:
+        _threads[:] = [t for t in _threads if t.is_alive()]
+        for i in range(len(_threads), app.config.get("EXAM_GRADER_WORKERS", 2)):
+            thread = threading.Thread(target=run_graders, args=(app,), name=f"exam-grader-{i}", daemon=True)
+            thread.start()
+            _threads.append(thread)
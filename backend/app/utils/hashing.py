@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from argon2.exceptions import VerifyMismatchError
+from flask import current_app
+
+from app.extensions import ph
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or too slow; surfaced to clients as 503."""
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def _get_pool():
+    """Bounded pool: HASH_WORKERS hashes run at once, HASH_QUEUE_SIZE more may wait."""
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = current_app.config.get("HASH_WORKERS", 2)
+                queued = current_app.config.get("HASH_QUEUE_SIZE", 16)
+                _slots = threading.BoundedSemaphore(workers + queued)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=current_app.config.get("HASH_TIMEOUT", 30))
+    except FutureTimeout:
+        # still queued: drop it so it doesn't burn a worker for nobody
+        future.cancel()
+        raise HashingBusy()
+
+
+def hash_password(password):
+    return _run(ph.hash, password)
+
+
+def verify_password(hashed, password):
+    """True if password matches hashed; False on mismatch."""
+    try:
+        return _run(ph.verify, hashed, password)
+    except VerifyMismatchError:
+        return False
+
+
+def needs_rehash(hashed):
+    """Whether hashed was made with cost parameters other than the current ones."""
+    return ph.check_needs_rehash(hashed)
@@ -0,0 +1,129 @@
+import secrets
+import threading
+from uuid import UUID
+
+from cachetools import TTLCache
+from flask import current_app, session
+from flask_login import user_logged_in
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, joinedload, object_session
+
+from app.extensions import db
+from app.models import ParentProfile, StudentProfile, TeacherProfile, User
+
+
+_lock = threading.Lock()
+_cache = None
+
+_PENDING_KEY = "identity_invalidate"
+_NONCE_KEY = "_login_nonce"
+
+
+def _get_cache():
+    """Process-local principal cache, or None when USER_CACHE_TTL is 0 (default)."""
+    global _cache
+    ttl = current_app.config.get("USER_CACHE_TTL", 0)
+    if not ttl:
+        return None
+    if _cache is None:
+        _cache = TTLCache(maxsize=current_app.config.get("USER_CACHE_SIZE", 4096), ttl=ttl)
+    return _cache
+
+
+# ============================================================
+# Loader (Flask-Login memoizes the result per request in g._login_user)
+# ============================================================
+
+def load_principal(user_id):
+    """Load the user and its role profiles in one round trip."""
+    try:
+        uid = UUID(str(user_id))
+    except (TypeError, ValueError):
+        current_app.logger.debug(f"[LOAD_USER] invalid id {user_id!r}")
+        return None
+
+    query = (
+        select(User)
+        .options(
+            joinedload(User.student_profile),
+            joinedload(User.teacher_profile),
+            joinedload(User.parent_profile),
+        )
+        .where(User.id == uid)
+    )
+
+    cache = _get_cache()
+    nonce = session.get(_NONCE_KEY)
+    if cache is None or nonce is None:
+        return db.session.execute(query).unique().scalar_one_or_none()
+
+    key = (uid, nonce)
+    with _lock:
+        cached = cache.get(key)
+    if cached is None:
+        # Loaded in a private session so the cached copy is never expired by
+        # the request's own commit; it stays detached and fully loaded.
+        with Session(db.engine) as private:
+            cached = private.execute(query).unique().scalar_one_or_none()
+        if cached is None:
+            return None
+        with _lock:
+            cache[key] = cached
+
+    # attach a copy of the cached state without touching the database
+    return db.session.merge(cached, load=False)
+
+
+def forget_principal(user_id):
+    """Drop every cached session entry of a user (logout, profile changes)."""
+    if _cache is None:
+        return
+    with _lock:
+        for key in [k for k in _cache.keys() if k[0] == user_id]:
+            _cache.pop(key, None)
+
+
+@user_logged_in.connect
+def _new_login_nonce(sender, user, **extra):
+    # every login starts a fresh cache key; logout drops the user's entries
+    session[_NONCE_KEY] = secrets.token_urlsafe(16)
+
+
+# ============================================================
+# Invalidation: user/profile writes drop the cache after commit
+# ============================================================
+
+def _remember(target, user_id):
+    s = object_session(target)
+    if s is not None and user_id is not None:
+        s.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_touched(mapper, connection, target):
+    _remember(target, target.id)
+
+
+@event.listens_for(StudentProfile, "after_insert")
+@event.listens_for(StudentProfile, "after_update")
+@event.listens_for(StudentProfile, "after_delete")
+@event.listens_for(TeacherProfile, "after_insert")
+@event.listens_for(TeacherProfile, "after_update")
+@event.listens_for(TeacherProfile, "after_delete")
+@event.listens_for(ParentProfile, "after_insert")
+@event.listens_for(ParentProfile, "after_update")
+@event.listens_for(ParentProfile, "after_delete")
+def _profile_touched(mapper, connection, target):
+    _remember(target, target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(s):
+    for user_id in s.info.pop(_PENDING_KEY, ()):
+        forget_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(s):
+    s.info.pop(_PENDING_KEY, None)
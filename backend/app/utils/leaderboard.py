@@ -0,0 +1,117 @@
+import threading
+
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import CourseEnrollment, StudentProfile, StudentScore, User
+
+
+MAX_PER_PAGE = 100
+
+_lock = threading.Lock()
+_cache = None
+_version = 0
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(maxsize=256, ttl=current_app.config.get("LEADERBOARD_CACHE_TTL", 30))
+    return _cache
+
+
+def bump_leaderboard_version():
+    """Invalidate cached pages in this process (called after ranks change)."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+# ============================================================
+# Queries (student_scores only; never scans exam_attempts)
+# ============================================================
+
+def _load_rows(offset, limit):
+    rows = (
+        db.session.query(StudentScore, StudentProfile, User.role_id)
+        .join(StudentProfile, StudentProfile.id == StudentScore.student_id)
+        .outerjoin(User, User.id == StudentProfile.user_id)
+        .order_by(StudentScore.avg_score.desc(), StudentScore.student_id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if not rows:
+        return []
+
+    enrolled = dict(
+        db.session.query(CourseEnrollment.student_id, func.count(CourseEnrollment.id))
+        .filter(CourseEnrollment.student_id.in_([score.student_id for score, _, _ in rows]))
+        .group_by(CourseEnrollment.student_id)
+        .all()
+    )
+
+    out = []
+    for position, (score, student, role_id) in enumerate(rows, start=offset + 1):
+        name = f"{student.first_name or ''} {student.last_name or ''}".strip() or "Student"
+        out.append({
+            "id": str(student.id),
+            "rank": score.rank or position,
+            "name": name,
+            "role_id": role_id,
+            "avatar": student.avatar_url,
+            "enrolled_courses": int(enrolled.get(score.student_id, 0)),
+            "average_score": float(score.avg_score or 0),
+            # Use exam count as a simple proxy for activity
+            "consistency_rate": min(int((score.scored_attempts or 0) * 5), 100),
+            "points": int((score.avg_score or 0) * 10)
+        })
+    return out
+
+
+def _ranked_total():
+    return db.session.query(func.count(StudentScore.student_id)).scalar() or 0
+
+
+# ============================================================
+# Snapshot + paging
+# ============================================================
+
+def get_leaderboard_page(page=1, per_page=MAX_PER_PAGE):
+    """Return (entries, total) for one leaderboard page.
+
+    The top LEADERBOARD_SIZE entries are kept as one cached snapshot and
+    pages inside it are sliced from memory; deeper pages are fetched with an
+    indexed ORDER BY avg_score query and cached under the same version key.
+    """
+    page = max(page or 1, 1)
+    per_page = min(max(per_page or MAX_PER_PAGE, 1), MAX_PER_PAGE)
+    offset = (page - 1) * per_page
+    top_n = current_app.config.get("LEADERBOARD_SIZE", 100)
+
+    cache = _get_cache()
+    with _lock:
+        version = _version
+        snapshot = cache.get(("top", version))
+        total = cache.get(("total", version))
+
+    if snapshot is None or total is None:
+        snapshot = _load_rows(0, top_n)
+        total = _ranked_total()
+        with _lock:
+            cache[("top", version)] = snapshot
+            cache[("total", version)] = total
+
+    if offset + per_page <= top_n:
+        return snapshot[offset:offset + per_page], total
+
+    key = ("page", version, page, per_page)
+    with _lock:
+        entries = cache.get(key)
+    if entries is None:
+        entries = _load_rows(offset, per_page)
+        with _lock:
+            cache[key] = entries
+    return entries, total
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Chapter, Lesson
+
+
+# ============================================================
+# Text extraction + chunking
+# ============================================================
+
+_BLOCKS = {"paragraph", "heading", "listItem", "blockquote", "codeBlock", "tableRow"}
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from how i in is it me my of on or "
+    "the this that to was what when where which who why will with you your".split()
+)
+
+
+def tiptap_text(node):
+    """Plain text of a Tiptap/ProseMirror JSON document (blocks end with newlines)."""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        return "".join(tiptap_text(n) for n in node)
+    if not isinstance(node, dict):
+        return ""
+
+    text = node.get("text", "")
+    text += "".join(tiptap_text(child) for child in node.get("content") or [])
+    if node.get("type") in _BLOCKS:
+        text += "\n"
+    elif node.get("type") == "hardBreak":
+        text += " "
+    return text
+
+
+def chunk_text(text, size, overlap):
+    words = text.split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    return [" ".join(words[i:i + size]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+# ============================================================
+# On-disk FTS5 index (bm25 ranking)
+# ============================================================
+
+_lock = threading.Lock()
+_initialized = set()
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    title, body,
+    lesson_id UNINDEXED, course_id UNINDEXED, seq UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS indexed_lessons (
+    lesson_id TEXT PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+"""
+
+
+def _connect():
+    path = current_app.config["LESSON_INDEX_PATH"]
+    conn = sqlite3.connect(path, timeout=10)
+    if path not in _initialized:
+        with _lock:
+            if path not in _initialized:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _initialized.add(path)
+    return conn
+
+
+def _fingerprint(title, content):
+    return hashlib.sha1(json.dumps([title, content], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def index_lesson(lesson, course_id=None):
+    """(Re)index one lesson; unchanged lessons are skipped by fingerprint."""
+    if course_id is None:
+        course_id = db.session.query(Chapter.course_id).filter(Chapter.id == lesson.chapter_id).scalar()
+
+    lesson_id = str(lesson.id)
+    fingerprint = _fingerprint(lesson.title, lesson.content)
+    size = current_app.config.get("LESSON_CHUNK_WORDS", 120)
+    overlap = current_app.config.get("LESSON_CHUNK_OVERLAP", 20)
+
+    conn = _connect()
+    try:
+        with conn:
+            row = conn.execute("SELECT fingerprint FROM indexed_lessons WHERE lesson_id = ?", (lesson_id,)).fetchone()
+            if row and row[0] == fingerprint:
+                return False
+
+            conn.execute("DELETE FROM chunks WHERE lesson_id = ?", (lesson_id,))
+            chunks = chunk_text(tiptap_text(lesson.content or {}), size, overlap)
+            conn.executemany(
+                "INSERT INTO chunks (title, body, lesson_id, course_id, seq) VALUES (?, ?, ?, ?, ?)",
+                [(lesson.title or "", body, lesson_id, str(course_id), seq) for seq, body in enumerate(chunks)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_lessons (lesson_id, course_id, fingerprint) VALUES (?, ?, ?)",
+                (lesson_id, str(course_id), fingerprint)
+            )
+        return True
+    finally:
+        conn.close()
+
+
+def remove_lesson(lesson_id):
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("DELETE FROM chunks WHERE lesson_id = ?", (str(lesson_id),))
+            conn.execute("DELETE FROM indexed_lessons WHERE lesson_id = ?", (str(lesson_id),))
+    finally:
+        conn.close()
+
+
+def reindex_lesson_safely(lesson):
+    """Index update from a write path: never fails the request."""
+    try:
+        index_lesson(lesson)
+    except Exception as e:
+        current_app.logger.error(f"[LESSON_INDEX] failed to index lesson {lesson.id}: {e}")
+
+
+def remove_lesson_safely(lesson_id):
+    try:
+        remove_lesson(lesson_id)
+    except Exception as e:
+        current_app.logger.error(f"[LESSON_INDEX] failed to drop lesson {lesson_id}: {e}")
+
+
+def rebuild_index():
+    """Index every changed lesson and drop lessons that no longer exist.
+
+    Returns the number of lessons (re)indexed.
+    """
+    rows = (
+        db.session.query(Lesson, Chapter.course_id)
+        .join(Chapter, Chapter.id == Lesson.chapter_id)
+        .yield_per(200)
+    )
+    live, count = set(), 0
+    for lesson, course_id in rows:
+        live.add(str(lesson.id))
+        count += index_lesson(lesson, course_id)
+
+    conn = _connect()
+    try:
+        indexed = {row[0] for row in conn.execute("SELECT lesson_id FROM indexed_lessons")}
+    finally:
+        conn.close()
+    for lesson_id in indexed - live:
+        remove_lesson(lesson_id)
+    return count
+
+
+def search_chunks(query, course_id=None, lesson_id=None, k=3):
+    """Top-k chunks by bm25 (title weighted 2x), scoped to a lesson or course."""
+    terms = [t for t in dict.fromkeys(t.lower() for t in _WORD.findall(query)) if t not in _STOPWORDS][:32]
+    if not terms:
+        return []
+    match = " OR ".join(f'"{t}"' for t in terms)
+
+    sql = "SELECT lesson_id, title, body FROM chunks WHERE chunks MATCH ?"
+    params = [match]
+    if lesson_id is not None:
+        sql += " AND lesson_id = ?"
+        params.append(str(lesson_id))
+    elif course_id is not None:
+        sql += " AND course_id = ?"
+        params.append(str(course_id))
+    sql += " ORDER BY bm25(chunks, 2.0, 1.0) LIMIT ?"
+    params.append(k)
+
+    conn = _connect()
+    try:
+        return [
+            {"lesson_id": row[0], "title": row[1], "text": row[2]}
+            for row in conn.execute(sql, params).fetchall()
+        ]
+    finally:
+        conn.close()
@@ -0,0 +1,124 @@
+import os
+import threading
+
+from flask import current_app
+
+
+class LLMNotConfigured(Exception):
+    pass
+
+
+class LLMBusy(Exception):
+    """All LLM slots are taken; surfaced to clients as 503."""
+
+
+# ============================================================
+# Backends (LLM_BACKEND = groq | fake)
+# ============================================================
+
+class GroqBackend:
+    """One Groq client (and so one HTTP connection pool) per process."""
+
+    def __init__(self, api_key, model, timeout):
+        from groq import Groq
+
+        self.model = model
+        self.client = Groq(api_key=api_key, timeout=timeout, max_retries=1)
+
+    def complete(self, messages, temperature, max_tokens):
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return completion.choices[0].message.content.strip()
+
+    def stream(self, messages, temperature, max_tokens):
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+class FakeBackend:
+    """Deterministic backend for tests and offline development."""
+
+    model = "fake"
+
+    def __init__(self, reply=None):
+        self.reply = reply
+
+    def _answer(self, messages):
+        return self.reply or f"You asked: {messages[-1]['content']}"
+
+    def complete(self, messages, temperature, max_tokens):
+        return self._answer(messages)
+
+    def stream(self, messages, temperature, max_tokens):
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+
+_lock = threading.Lock()
+_backend = None
+_slots = None
+
+
+def get_llm():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                name = current_app.config.get("LLM_BACKEND", "groq")
+                if name == "fake":
+                    _backend = FakeBackend()
+                elif name == "groq":
+                    api_key = os.getenv("GROQ_API_KEY")
+                    if not api_key:
+                        raise LLMNotConfigured("Groq API key not configured")
+                    _backend = GroqBackend(
+                        api_key,
+                        current_app.config["LLM_MODEL"],
+                        current_app.config.get("LLM_TIMEOUT", 60)
+                    )
+                else:
+                    raise LLMNotConfigured(f"Unknown LLM_BACKEND: {name}")
+    return _backend
+
+
+def set_llm(backend):
+    """Swap the process-wide backend (tests)."""
+    global _backend
+    with _lock:
+        _backend = backend
+
+
+# ============================================================
+# Concurrency limit
+# ============================================================
+
+def acquire_llm_slot():
+    """Take one of LLM_MAX_CONCURRENCY slots, waiting up to LLM_QUEUE_TIMEOUT.
+
+    Slots are per process, so this only limits anything under threaded
+    workers (gthread, see Procfile). Returns the release callable; raises
+    LLMBusy when no slot frees up.
+    """
+    global _slots
+    if _slots is None:
+        with _lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(current_app.config.get("LLM_MAX_CONCURRENCY", 4))
+
+    if not _slots.acquire(timeout=current_app.config.get("LLM_QUEUE_TIMEOUT", 5)):
+        raise LLMBusy()
+    return _slots.release
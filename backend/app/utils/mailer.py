@@ -0,0 +1,276 @@
+import json
+import smtplib
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import EmailOutbox
+
+try:
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail as SGMail
+except ImportError:
+    SendGridAPIClient = None
+    SGMail = None
+
+
+# ============================================================
+# Transports (one instance per process, reused across batches)
+# ============================================================
+
+class SendGridTransport:
+    def __init__(self, config):
+        api_key = config.get("SENDGRID_API_KEY")
+        self.from_email = config.get("SENDGRID_FROM_EMAIL")
+
+        if not api_key:
+            raise RuntimeError("SENDGRID_API_KEY is not configured")
+        if not self.from_email:
+            raise RuntimeError("SENDGRID_FROM_EMAIL is not configured")
+        if not SendGridAPIClient or not SGMail:
+            raise RuntimeError("SendGrid SDK not installed")
+
+        self.client = SendGridAPIClient(api_key)
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, email):
+        self.client.send(SGMail(
+            from_email=self.from_email,
+            to_emails=email.to_email,
+            subject=email.subject,
+            html_content=email.html,
+            plain_text_content=email.text,
+        ))
+
+
+class SMTPTransport:
+    """Plain SMTP (MAIL_* settings); one connection per batch."""
+
+    def __init__(self, config):
+        self.host = config.get("MAIL_SERVER") or "localhost"
+        self.port = config.get("MAIL_PORT", 25)
+        self.username = config.get("MAIL_USERNAME")
+        self.password = config.get("MAIL_PASSWORD")
+        self.use_tls = config.get("MAIL_USE_TLS", False)
+        self.from_email = config.get("SENDGRID_FROM_EMAIL") or config.get("MAIL_USERNAME") or "noreply@localhost"
+        self.conn = None
+
+    def open(self):
+        self.conn = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            self.conn.starttls()
+        if self.username:
+            self.conn.login(self.username, self.password)
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.quit()
+            except smtplib.SMTPException:
+                pass
+            self.conn = None
+
+    def send(self, email):
+        message = EmailMessage()
+        message["From"] = self.from_email
+        message["To"] = email.to_email
+        message["Subject"] = email.subject
+        message.set_content(email.text)
+        message.add_alternative(email.html, subtype="html")
+        self.conn.send_message(message)
+
+
+class FileTransport:
+    """Appends each email as a JSON line to EMAIL_FILE_PATH (local dev and tests)."""
+
+    def __init__(self, config):
+        self.path = config.get("EMAIL_FILE_PATH", "sent_emails.jsonl")
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, email):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "to": email.to_email,
+                "subject": email.subject,
+                "text": email.text,
+                "html": email.html,
+                "sent_at": datetime.utcnow().isoformat()
+            }) + "\n")
+
+
+TRANSPORTS = {
+    "sendgrid": SendGridTransport,
+    "smtp": SMTPTransport,
+    "file": FileTransport,
+}
+
+# What the transports see: a detached snapshot of a claimed outbox row
+OutgoingEmail = namedtuple("OutgoingEmail", "id to_email subject html text attempts")
+
+_WAKE_KEY = "email_outbox_wake"
+
+_send_lock = threading.Lock()
+_thread_lock = threading.Lock()
+_transport = None
+_wake = threading.Event()
+_thread = None
+
+
+def _get_transport():
+    global _transport
+    if _transport is None:
+        name = current_app.config.get("EMAIL_TRANSPORT", "sendgrid")
+        _transport = TRANSPORTS[name](current_app.config)
+    return _transport
+
+
+# ============================================================
+# Request path: enqueue only
+# ============================================================
+
+def enqueue_email(to_email, subject, html, text):
+    """Add an email to the outbox in the caller's transaction; the caller commits.
+
+    The dispatcher is woken once that commit lands, so a rolled-back request
+    never sends anything.
+    """
+    db.session.add(EmailOutbox(to_email=to_email, subject=subject, html=html, text=text))
+    db.session.info[_WAKE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    if session.info.pop(_WAKE_KEY, False) and current_app.config.get("EMAIL_DISPATCHER_THREAD"):
+        _ensure_dispatcher_thread(current_app._get_current_object())
+        _wake.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_WAKE_KEY, None)
+
+
+# ============================================================
+# Dispatcher
+# ============================================================
+
+def _retry_delay(attempts):
+    base = current_app.config.get("EMAIL_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 3600))
+
+
+def dispatch_pending(batch_size=None):
+    """Deliver one batch of due emails. Returns the number of rows processed.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased for
+    EMAIL_SEND_LEASE_SECONDS in one short transaction, so several
+    dispatchers (threads, workers or the CLI) can run side by side and no
+    lock is held while talking to the mail provider. Results are written
+    back in one executemany UPDATE. A dispatcher that dies mid-batch leaves
+    its rows to be retried once the lease runs out (at-least-once delivery).
+    """
+    batch_size = batch_size or current_app.config.get("EMAIL_BATCH_SIZE", 50)
+    max_attempts = current_app.config.get("EMAIL_MAX_ATTEMPTS", 5)
+    lease = timedelta(seconds=current_app.config.get("EMAIL_SEND_LEASE_SECONDS", 300))
+
+    claimed = (
+        EmailOutbox.query
+        .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= datetime.utcnow())
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not claimed:
+        db.session.rollback()
+        return 0
+
+    lease_until = datetime.utcnow() + lease
+    batch = []
+    for email in claimed:
+        email.attempts += 1
+        email.next_attempt_at = lease_until
+        batch.append(OutgoingEmail(email.id, email.to_email, email.subject, email.html, email.text, email.attempts))
+    db.session.commit()
+
+    rows = []
+    with _send_lock:
+        try:
+            transport = _get_transport()
+            transport.open()
+        except Exception as e:
+            transport, open_error = None, e
+
+        for email in batch:
+            now = datetime.utcnow()
+            try:
+                if transport is None:
+                    raise RuntimeError(open_error)
+                transport.send(email)
+            except Exception as e:
+                if email.attempts >= max_attempts:
+                    status, next_attempt_at = "failed", now
+                    current_app.logger.error(f"[EMAIL] giving up on {email.id} to {email.to_email}: {e}")
+                else:
+                    status, next_attempt_at = "pending", now + _retry_delay(email.attempts)
+                    current_app.logger.warning(f"[EMAIL] retry {email.attempts} for {email.id}: {e}")
+                rows.append({"id": email.id, "status": status, "next_attempt_at": next_attempt_at,
+                             "last_error": str(e)[:2000], "sent_at": None})
+            else:
+                rows.append({"id": email.id, "status": "sent", "next_attempt_at": now,
+                             "last_error": None, "sent_at": now})
+
+        if transport is not None:
+            transport.close()
+
+    db.session.execute(update(EmailOutbox), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def run_dispatcher(app, once=False):
+    """Deliver due emails until the outbox is empty (once) or forever."""
+    with app.app_context():
+        poll = app.config.get("EMAIL_POLL_SECONDS", 10)
+        while True:
+            _wake.clear()
+            try:
+                processed = dispatch_pending()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"[EMAIL] dispatcher error: {e}")
+                processed = 0
+            finally:
+                db.session.remove()
+
+            if processed:
+                continue
+            if once:
+                return
+            _wake.wait(poll)
+
+
+def _ensure_dispatcher_thread(app):
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_dispatcher, args=(app,), name="email-dispatcher", daemon=True)
+            _thread.start()
@@ -0,0 +1,42 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import literal, tuple_
+
+
+def encode_cursor(*values):
+    """Opaque, URL-safe cursor holding the sort key of the last row returned."""
+    raw = json.dumps([
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, uuid.UUID) else v
+        for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, *types):
+    """Decode a cursor made by encode_cursor, converting each value with types.
+
+    Raises ValueError on anything malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    try:
+        return tuple(None if v is None else convert(v) for convert, v in zip(types, values))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_after(columns, values, descending=False):
+    """Row-value predicate selecting rows strictly after the cursor position."""
+    position = tuple_(*(literal(v, column.type) for column, v in zip(columns, values)))
+    if descending:
+        return tuple_(*columns) < position
+    return tuple_(*columns) > position
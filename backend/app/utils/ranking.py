@@ -0,0 +1,159 @@
+from sqlalchemy import and_, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from app.models import ExamAttempt, StudentScore
+from app.utils.leaderboard import bump_leaderboard_version
+
+
+# Advisory transaction lock serializing rank maintenance across workers
+_RANK_LOCK_KEY = 540_017
+
+
+# ============================================================
+# Write path (driven by submit_exam and the graders)
+# ============================================================
+
+def record_exam_score(student_id, score):
+    """Fold one graded attempt into the student's aggregate and shift ranks.
+
+    Incremental: only students whose average lies between this student's
+    old and new average move by one place, and the student's own rank is
+    one indexed count. Runs inside the caller's transaction and holds the
+    rank lock until it commits, so concurrent graders apply their moves one
+    after another.
+    """
+    if score is None:
+        return
+
+    db.session.execute(select(func.pg_advisory_xact_lock(_RANK_LOCK_KEY)))
+
+    table = StudentScore.__table__
+    old_avg = db.session.execute(
+        select(table.c.avg_score).where(table.c.student_id == student_id)
+    ).scalar()
+
+    stmt = pg_insert(table).values(
+        student_id=student_id,
+        score_sum=score,
+        scored_attempts=1,
+        avg_score=score,
+    )
+    new_sum = table.c.score_sum + stmt.excluded.score_sum
+    new_count = table.c.scored_attempts + 1
+    new_avg = db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id],
+        set_={
+            "score_sum": new_sum,
+            "scored_attempts": new_count,
+            "avg_score": new_sum / new_count,
+            "updated_at": func.now(),
+        },
+    ).returning(table.c.avg_score)).scalar()
+
+    _shift_ranks(table, student_id, old_avg, new_avg)
+
+
+def _shift_ranks(table, student_id, old_avg, new_avg):
+    # rank = 1 + students strictly ahead; moving from old_avg to new_avg only
+    # changes that count for students averaging in between
+    avg = table.c.avg_score
+    if old_avg is None:
+        moved, delta = avg < new_avg, 1
+    elif new_avg > old_avg:
+        moved, delta = and_(avg >= old_avg, avg < new_avg), 1
+    elif new_avg < old_avg:
+        moved, delta = and_(avg >= new_avg, avg < old_avg), -1
+    else:
+        moved = None
+
+    if moved is not None:
+        db.session.execute(
+            update(table)
+            .where(moved, table.c.student_id != student_id, table.c.rank.isnot(None))
+            .values(rank=table.c.rank + delta)
+        )
+
+    ahead = select(func.count()).select_from(table).where(avg > new_avg).scalar_subquery()
+    db.session.execute(
+        update(table).where(table.c.student_id == student_id).values(rank=ahead + 1)
+    )
+
+
+def refresh_ranks():
+    """Recompute every rank from scratch (rebuild / `flask refresh-student-ranks`).
+
+    Normal grading keeps ranks current incrementally; this repairs drift
+    from writes that bypass record_exam_score. Only rows whose rank actually
+    changed are written. Returns the number of rows updated, or None if
+    the rank lock is busy.
+    """
+    if not db.session.execute(select(func.pg_try_advisory_xact_lock(_RANK_LOCK_KEY))).scalar():
+        db.session.rollback()
+        return None
+
+    result = db.session.execute(text("""
+        UPDATE student_scores AS s
+        SET rank = r.rnk
+        FROM (
+            SELECT student_id, RANK() OVER (ORDER BY avg_score DESC) AS rnk
+            FROM student_scores
+        ) r
+        WHERE s.student_id = r.student_id
+          AND s.rank IS DISTINCT FROM r.rnk
+    """))
+    db.session.commit()
+    bump_leaderboard_version()
+    return result.rowcount
+
+
+# ============================================================
+# Read path
+# ============================================================
+
+def global_rank_for(student_id):
+    """1 + number of students with a strictly higher average score.
+
+    Normally a primary-key lookup of the materialized rank; students
+    without one yet fall back to an indexed count.
+    """
+    row = db.session.get(StudentScore, student_id)
+    if row is not None and row.rank is not None:
+        return row.rank
+
+    avg = row.avg_score if row is not None else 0
+    higher = db.session.query(func.count(StudentScore.student_id)).filter(StudentScore.avg_score > avg).scalar()
+    return higher + 1
+
+
+# ============================================================
+# Rebuild
+# ============================================================
+
+def rebuild_student_scores():
+    """Recompute every aggregate from exam_attempts, then refresh ranks."""
+    source = (
+        select(
+            ExamAttempt.student_id,
+            func.sum(ExamAttempt.score),
+            func.count(ExamAttempt.score),
+            func.avg(ExamAttempt.score),
+        )
+        .where(ExamAttempt.score.isnot(None))
+        .group_by(ExamAttempt.student_id)
+    )
+
+    table = StudentScore.__table__
+    stmt = pg_insert(table).from_select(["student_id", "score_sum", "scored_attempts", "avg_score"], source)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id],
+        set_={
+            "score_sum": stmt.excluded.score_sum,
+            "scored_attempts": stmt.excluded.scored_attempts,
+            "avg_score": stmt.excluded.avg_score,
+            "updated_at": func.now(),
+        },
+    ))
+    db.session.commit()
+
+    return refresh_ranks()
@@ -0,0 +1,278 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_login import user_logged_in, user_logged_out
+from werkzeug.datastructures import CallbackDict
+
+
+def new_session_id():
+    return secrets.token_urlsafe(24)
+
+
+# ============================================================
+# Stores (SESSION_BACKEND = memory | sqlite | redis)
+#
+# load(sid) -> (payload, expires_at) or None; save / touch / delete;
+# sweep() drops expired rows in bulk and returns how many went away.
+# ============================================================
+
+class MemorySessionStore:
+    """Process-local; only correct with a single worker (dev, tests)."""
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def load(self, sid):
+        entry = self._entries.get(sid)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry
+
+    def save(self, sid, payload, expires_at):
+        with self._lock:
+            self._entries[sid] = (payload, expires_at)
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep_locked()
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                self._entries[sid] = (entry[0], expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def sweep(self):
+        with self._lock:
+            return self._sweep_locked()
+
+    def _sweep_locked(self):
+        now = time.time()
+        expired = [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for sid in expired:
+            del self._entries[sid]
+        return len(expired)
+
+
+class SQLiteSessionStore:
+    """One file shared by every worker on the host."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        sid TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _write(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def load(self, sid):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+                (sid, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def save(self, sid, payload, expires_at):
+        self._write(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+            (sid, payload, expires_at)
+        )
+
+    def touch(self, sid, expires_at):
+        self._write("UPDATE sessions SET expires_at = ? WHERE sid = ?", (expires_at, sid))
+
+    def delete(self, sid):
+        self._write("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self):
+        return self._write("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisSessionStore:
+    """Shared cache for multi-host deployments; Redis expires keys itself."""
+
+    def __init__(self, url, prefix="session:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def load(self, sid):
+        pipe = self.client.pipeline()
+        pipe.get(self.prefix + sid)
+        pipe.pttl(self.prefix + sid)
+        payload, ttl_ms = pipe.execute()
+        if payload is None or ttl_ms < 0:
+            return None
+        return payload.decode(), time.time() + ttl_ms / 1000
+
+    def save(self, sid, payload, expires_at):
+        self.client.set(self.prefix + sid, payload, pxat=int(expires_at * 1000))
+
+    def touch(self, sid, expires_at):
+        self.client.pexpireat(self.prefix + sid, int(expires_at * 1000))
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def sweep(self):
+        return 0
+
+
+def make_session_store(config):
+    backend = config.get("SESSION_BACKEND", "cookie")
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(config["SESSION_SQLITE_PATH"])
+    if backend == "redis":
+        return RedisSessionStore(config["SESSION_REDIS_URL"])
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+# ============================================================
+# Flask session interface
+# ============================================================
+
+class ServerSideSession(CallbackDict, SessionMixin):
+
+    def __init__(self, initial=None, sid=None, expires_at=0, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.new = new
+        self.modified = False
+        self.revoked = []
+
+    def rotate(self):
+        if not self.new:
+            self.revoked.append(self.sid)
+        self.sid = new_session_id()
+        self.new = True
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """The cookie carries only an opaque random id; data lives in the store.
+
+    Unchanged sessions cost one store read per request. Their expiry is
+    pushed out (PERMANENT_SESSION_LIFETIME) once less than half of it is left.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and len(sid) <= 64:
+            entry = self.store.load(sid)
+            if entry is not None:
+                payload, expires_at = entry
+                try:
+                    return ServerSideSession(self.serializer.loads(payload), sid=sid, expires_at=expires_at)
+                except ValueError:
+                    pass
+        return ServerSideSession(sid=new_session_id(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        for sid in session.revoked:
+            self.store.delete(sid)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path, secure=secure, samesite=samesite, httponly=httponly)
+                response.vary.add("Cookie")
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        if session.modified:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)), now + lifetime)
+        elif session.expires_at - now < lifetime / 2:
+            self.store.touch(session.sid, now + lifetime)
+        elif not self.should_set_cookie(app, session):
+            return
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite
+        )
+        response.vary.add("Cookie")
+
+
+def _rotate_session_id(sender, user, **extra):
+    # login: a fresh id defeats fixation; logout: the old id is deleted from
+    # the store right away, so a copied cookie stops working immediately
+    from flask import session
+
+    if isinstance(session, ServerSideSession):
+        session.rotate()
+
+
+def init_server_sessions(app):
+    """Install the configured server-side store (SESSION_BACKEND != cookie)."""
+    store = make_session_store(app.config)
+    app.session_interface = ServerSideSessionInterface(store)
+    user_logged_in.connect(_rotate_session_id, app)
+    user_logged_out.connect(_rotate_session_id, app)
+    return store
@@ -0,0 +1,51 @@
+import os
+import shutil
+
+from flask import current_app
+
+
+# ============================================================
+# Media storage backends (MEDIA_STORAGE = cloudinary | local)
+# ============================================================
+
+class CloudinaryStorage:
+    def save(self, path, public_id, folder, width=None, height=None):
+        """Upload the file at path and return its public URL. Raises on failure."""
+        from app.utils.cloudinary import cloudinary
+
+        kwargs = {
+            "public_id": public_id,
+            "folder": folder,
+            "resource_type": "image",
+            "overwrite": True,
+        }
+        if width and height:
+            kwargs["transformation"] = [{"width": width, "height": height, "crop": "fill"}]
+
+        result = cloudinary.uploader.upload(path, **kwargs)
+        return result["secure_url"]
+
+
+class LocalStorage:
+    """Copies files under MEDIA_ROOT and serves them from MEDIA_URL (no resizing)."""
+
+    def __init__(self, root, base_url):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, path, public_id, folder, width=None, height=None):
+        ext = os.path.splitext(path)[1]
+        name = f"{public_id}{ext}"
+        target_dir = os.path.join(self.root, folder)
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copyfile(path, os.path.join(target_dir, name))
+        return f"{self.base_url}/{folder}/{name}"
+
+
+def get_storage():
+    backend = current_app.config.get("MEDIA_STORAGE", "cloudinary")
+    if backend == "local":
+        return LocalStorage(current_app.config["MEDIA_ROOT"], current_app.config.get("MEDIA_URL", "/media"))
+    if backend == "cloudinary":
+        return CloudinaryStorage()
+    raise RuntimeError(f"Unknown MEDIA_STORAGE backend: {backend}")
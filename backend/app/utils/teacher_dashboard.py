@@ -0,0 +1,139 @@
+import threading
+
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models import Course, CourseEnrollment, CourseRating, CourseStats
+
+
+_lock = threading.Lock()
+_cache = None
+_course_owner = None  # course_id -> teacher_id, learned while building dashboards
+
+_PENDING_KEY = "teacher_dashboard_invalidate"
+
+
+def _get_cache():
+    global _cache, _course_owner
+    if _cache is None:
+        ttl = current_app.config.get("TEACHER_DASHBOARD_CACHE_TTL", 5)
+        _cache = TTLCache(maxsize=1024, ttl=ttl)
+        # an owner entry is only needed while that teacher's dashboard is cached
+        _course_owner = TTLCache(maxsize=16384, ttl=ttl)
+    return _cache
+
+
+# ============================================================
+# Dashboard query
+# ============================================================
+
+def _build_dashboard(teacher_id):
+    enrollments = func.coalesce(CourseStats.enrollment_count, 0)
+    avg_rating = func.coalesce(CourseStats.rating_sum * 1.0 / func.nullif(CourseStats.rating_count, 0), 0)
+    revenue = func.coalesce(Course.price, 0) * enrollments
+
+    rows = (
+        db.session.query(
+            Course.id,
+            Course.title,
+            Course.thumbnail_url,
+            Course.status,
+            enrollments.label("enrollments"),
+            avg_rating.label("average_rating"),
+            revenue.label("revenue"),
+            func.sum(enrollments).over().label("total_students"),
+            func.sum(revenue).over().label("total_revenue"),
+        )
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .filter(Course.teacher_id == teacher_id)
+        .order_by(Course.created_at.desc())
+        .all()
+    )
+
+    return {
+        "total_courses": len(rows),
+        "total_students": int(rows[0].total_students or 0) if rows else 0,
+        "total_revenue": round(float(rows[0].total_revenue or 0), 2) if rows else 0.0,
+        "courses": [
+            {
+                "id": str(r.id),
+                "title": r.title,
+                "thumbnail_url": r.thumbnail_url,
+                "status": r.status,
+                "enrollments": int(r.enrollments),
+                "average_rating": round(float(r.average_rating), 2),
+                "revenue": round(float(r.revenue), 2)
+            }
+            for r in rows
+        ]
+    }, [r.id for r in rows]
+
+
+def load_teacher_dashboard(teacher_id):
+    """Teacher dashboard payload, built with one grouped query and cached per teacher.
+
+    The cache is per process; other workers catch up within TEACHER_DASHBOARD_CACHE_TTL.
+    """
+    cache = _get_cache()
+    with _lock:
+        data = cache.get(teacher_id)
+    if data is not None:
+        return data
+
+    data, course_ids = _build_dashboard(teacher_id)
+    with _lock:
+        cache[teacher_id] = data
+        for course_id in course_ids:
+            _course_owner[course_id] = teacher_id
+    return data
+
+
+def invalidate_teacher_dashboard(teacher_id=None, course_id=None):
+    with _lock:
+        if teacher_id is None and course_id is not None and _course_owner is not None:
+            teacher_id = _course_owner.get(course_id)
+        if teacher_id is not None and _cache is not None:
+            _cache.pop(teacher_id, None)
+
+
+# ============================================================
+# Invalidation: collect touched courses during flush, drop cache after commit
+# ============================================================
+
+def _remember(target, key):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(key)
+
+
+@event.listens_for(CourseEnrollment, "after_insert")
+@event.listens_for(CourseEnrollment, "after_delete")
+@event.listens_for(CourseRating, "after_insert")
+@event.listens_for(CourseRating, "after_update")
+@event.listens_for(CourseRating, "after_delete")
+def _course_counters_touched(mapper, connection, target):
+    _remember(target, ("course", target.course_id))
+
+
+@event.listens_for(Course, "after_insert")
+@event.listens_for(Course, "after_update")
+@event.listens_for(Course, "after_delete")
+def _course_touched(mapper, connection, target):
+    _remember(target, ("teacher", target.teacher_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for kind, value in session.info.pop(_PENDING_KEY, ()):
+        if kind == "teacher":
+            invalidate_teacher_dashboard(teacher_id=value)
+        else:
+            invalidate_teacher_dashboard(course_id=value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
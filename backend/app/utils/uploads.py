@@ -0,0 +1,174 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Course, StudentProfile, UploadJob
+from app.utils.storage import get_storage
+
+
+# kind -> (model, url column, folder, width, height)
+UPLOAD_KINDS = {
+    "student_avatar": (StudentProfile, "avatar_url", "avatars", 400, 400),
+    "course_thumbnail": (Course, "thumbnail_url", "course_thumbnails", 1200, 675),
+}
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("UPLOAD_WORKERS", 2),
+                    thread_name_prefix="upload"
+                )
+    return _executor
+
+
+def avatar_kind_for(model_class):
+    """Upload kind that sets model_class.avatar_url, or None if it has no avatar."""
+    for kind, (model, column, *_) in UPLOAD_KINDS.items():
+        if model is model_class and column == "avatar_url":
+            return kind
+    return None
+
+
+def upload_extension(file):
+    """Lower-cased extension of an uploaded image; raises ValueError if unsupported."""
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f"Unsupported image type; allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
+    return ext
+
+
+# ============================================================
+# Request path: spool to disk, record a job, hand it to the pool
+# ============================================================
+
+def spool_upload(file, kind, target_id, owner_id, public_id):
+    ext = upload_extension(file)
+    spool_dir = current_app.config["UPLOAD_SPOOL_DIR"]
+    os.makedirs(spool_dir, exist_ok=True)
+
+    job_id = uuid.uuid4()
+    path = os.path.join(spool_dir, f"{job_id}{ext}")
+    file.save(path)
+
+    job = UploadJob(
+        id=job_id,
+        owner_id=owner_id,
+        kind=kind,
+        target_id=target_id,
+        spool_path=path,
+        public_id=public_id
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _schedule(current_app._get_current_object(), job_id)
+    return job
+
+
+def _schedule(app, job_id, delay=0):
+    if delay:
+        timer = threading.Timer(delay, _schedule, args=(app, job_id))
+        timer.daemon = True
+        timer.start()
+        return
+    with app.app_context():
+        _get_executor().submit(_run, app, job_id)
+
+
+def _run(app, job_id):
+    with app.app_context():
+        try:
+            process_upload_job(job_id)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"[UPLOAD] job {job_id} crashed: {e}")
+        finally:
+            db.session.remove()
+
+
+# ============================================================
+# Worker
+# ============================================================
+
+def _remove_spool(job):
+    try:
+        os.remove(job.spool_path)
+    except OSError:
+        pass
+
+
+def process_upload_job(job_id, schedule_retry=True):
+    """Push one spooled file to storage and point the target row at it."""
+    claimed = db.session.execute(
+        update(UploadJob)
+        .where(UploadJob.id == job_id, UploadJob.status == "pending")
+        .values(status="processing", attempts=UploadJob.attempts + 1)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return None
+
+    job = db.session.get(UploadJob, job_id)
+    model, column, folder, width, height = UPLOAD_KINDS[job.kind]
+
+    try:
+        url = get_storage().save(job.spool_path, job.public_id, folder, width, height)
+    except Exception as e:
+        job.last_error = str(e)[:2000]
+        if job.attempts >= current_app.config.get("UPLOAD_MAX_ATTEMPTS", 3):
+            job.status = "failed"
+            _remove_spool(job)
+            current_app.logger.error(f"[UPLOAD] giving up on job {job.id}: {e}")
+        else:
+            job.status = "pending"
+            current_app.logger.warning(f"[UPLOAD] retry {job.attempts} for job {job.id}: {e}")
+        db.session.commit()
+
+        if job.status == "pending" and schedule_retry:
+            base = current_app.config.get("UPLOAD_RETRY_BASE_SECONDS", 5)
+            _schedule(current_app._get_current_object(), job.id, delay=base * 2 ** (job.attempts - 1))
+        return job
+
+    target = db.session.get(model, job.target_id)
+    if target is not None:
+        setattr(target, column, url)
+    job.status = "done"
+    job.result_url = url
+    job.last_error = None
+    db.session.commit()
+
+    _remove_spool(job)
+    return job
+
+
+def resume_upload_jobs(stale_after=timedelta(minutes=10)):
+    """Run pending jobs and jobs stuck in processing (e.g. after a restart) inline.
+
+    Returns the number of jobs attempted.
+    """
+    db.session.execute(
+        update(UploadJob)
+        .where(UploadJob.status == "processing", UploadJob.updated_at < datetime.utcnow() - stale_after)
+        .values(status="pending")
+    )
+    db.session.commit()
+
+    job_ids = [row.id for row in db.session.query(UploadJob.id).filter(UploadJob.status == "pending").all()]
+    for job_id in job_ids:
+        process_upload_job(job_id, schedule_retry=False)
+    return len(job_ids)
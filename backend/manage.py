@@ -1,4 +1,5 @@
 import os
+import click
 from app import create_app
 from app.extensions import db
 from flask_migrate import Migrate
@@ -10,3 +11,81 @@ app = create_app(config_name)
 migrate = Migrate(app, db)
 
 
+@app.cli.command("reconcile-course-stats")
+def reconcile_course_stats_command():
+    """Backfill / repair the denormalized course and progress counters."""
+    from app.models.course_stats import reconcile_course_stats, reconcile_enrollment_progress
+
+    count = reconcile_course_stats()
+    click.echo(f"Reconciled stats for {count} courses")
+    count = reconcile_enrollment_progress()
+    click.echo(f"Reconciled progress for {count} enrollments")
+
+
+@app.cli.command("refresh-student-ranks")
+def refresh_student_ranks_command():
+    """Rebuild student score aggregates from exam_attempts and re-rank."""
+    from app.utils.ranking import rebuild_student_scores
+
+    changed = rebuild_student_scores()
+    click.echo(f"Re-ranked students ({changed or 0} ranks changed)")
+
+
+@app.cli.command("send-emails")
+@click.option("--loop", is_flag=True, help="Keep polling the outbox instead of exiting when it is empty.")
+def send_emails_command(loop):
+    """Deliver pending emails from the outbox."""
+    from app.utils.mailer import run_dispatcher
+
+    run_dispatcher(app, once=not loop)
+    click.echo("Outbox drained" if not loop else "Dispatcher stopped")
+
+
+@app.cli.command("process-uploads")
+def process_uploads_command():
+    """Run pending or stalled media upload jobs (e.g. after a restart)."""
+    from app.utils.uploads import resume_upload_jobs
+
+    count = resume_upload_jobs()
+    click.echo(f"Processed {count} upload jobs")
+
+
+@app.cli.command("rebuild-lesson-index")
+def rebuild_lesson_index_command():
+    """Index lesson content for the AI tutor's retrieval context."""
+    from app.utils.lesson_index import rebuild_index
+
+    count = rebuild_index()
+    click.echo(f"Indexed {count} changed lessons")
+
+
+@app.cli.command("grade-submissions")
+@click.option("--loop", is_flag=True, help="Keep polling for pending attempts instead of exiting when none are left.")
+def grade_submissions_command(loop):
+    """Grade exam attempts queued by EXAM_GRADING_MODE=queued."""
+    from app.utils.grading import run_graders
+
+    run_graders(app, once=not loop)
+    click.echo("Grading queue drained" if not loop else "Graders stopped")
+
+
+@app.cli.command("expire-exam-attempts")
+@click.option("--loop", is_flag=True, help="Run the deadline scheduler in the foreground instead of one pass.")
+def expire_exam_attempts_command(loop):
+    """Close and grade open exam attempts that are past their time limit."""
+    from app.utils.exam_deadlines import expire_overdue_attempts, run_scheduler
+
+    if loop:
+        run_scheduler(app)
+    count = expire_overdue_attempts()
+    click.echo(f"Closed {count} expired attempts")
+
+
+@app.cli.command("sweep-sessions")
+def sweep_sessions_command():
+    """Delete expired server-side sessions."""
+    store = getattr(app.session_interface, "store", None)
+    if store is None:
+        click.echo("SESSION_BACKEND is cookie; nothing to sweep")
+        return
+    click.echo(f"Removed {store.sweep()} expired sessions")
@@ -0,0 +1,42 @@
+"""add email_outbox
+
+Revision ID: 0818508b33ed
+Revises: 52a225b71464
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0818508b33ed'
+down_revision = '52a225b71464'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_outbox',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('to_email', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('html', sa.Text(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.create_index('idx_email_outbox_due', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.drop_index('idx_email_outbox_due')
+
+    op.drop_table('email_outbox')
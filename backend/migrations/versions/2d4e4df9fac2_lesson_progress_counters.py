@@ -0,0 +1,73 @@
+"""lesson progress counters
+
+Revision ID: 2d4e4df9fac2
+Revises: abd9b59ab04b
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d4e4df9fac2'
+down_revision = 'abd9b59ab04b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lesson_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('completed_lessons', sa.Integer(), server_default='0', nullable=False))
+
+    # drop duplicate completions before enforcing uniqueness
+    op.execute("""
+        DELETE FROM lesson_completions a
+        USING lesson_completions b
+        WHERE a.lesson_id = b.lesson_id
+          AND a.student_id = b.student_id
+          AND a.id > b.id
+    """)
+    with op.batch_alter_table('lesson_completions', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_lesson_completion_student', ['lesson_id', 'student_id'])
+
+    # backfill
+    op.execute("""
+        UPDATE course_stats s
+        SET lesson_count = l.lesson_count
+        FROM (SELECT ch.course_id, COUNT(*) AS lesson_count
+              FROM lessons le JOIN course_chapters ch ON ch.id = le.chapter_id
+              GROUP BY ch.course_id) l
+        WHERE l.course_id = s.course_id
+    """)
+    op.execute("""
+        UPDATE course_enrollments e
+        SET completed_lessons = d.done
+        FROM (SELECT ch.course_id, lc.student_id, COUNT(*) AS done
+              FROM lesson_completions lc
+              JOIN lessons le ON le.id = lc.lesson_id
+              JOIN course_chapters ch ON ch.id = le.chapter_id
+              GROUP BY ch.course_id, lc.student_id) d
+        WHERE d.course_id = e.course_id AND d.student_id = e.student_id
+    """)
+    op.execute("""
+        UPDATE course_enrollments e
+        SET progress_percent = LEAST(e.completed_lessons * 100.0 / s.lesson_count, 100.0),
+            completed = e.completed_lessons >= s.lesson_count
+        FROM course_stats s
+        WHERE s.course_id = e.course_id AND s.lesson_count > 0
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('lesson_completions', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_lesson_completion_student', type_='unique')
+
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.drop_column('completed_lessons')
+
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        batch_op.drop_column('lesson_count')
@@ -0,0 +1,48 @@
+"""add student_scores
+
+Revision ID: 39e425ffba2b
+Revises: 2d4e4df9fac2
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '39e425ffba2b'
+down_revision = '2d4e4df9fac2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_scores',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('score_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('scored_attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('avg_score', sa.Float(), server_default='0', nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student_profiles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    with op.batch_alter_table('student_scores', schema=None) as batch_op:
+        batch_op.create_index('idx_student_scores_avg_score', ['avg_score'], unique=False)
+
+    # backfill
+    op.execute("""
+        INSERT INTO student_scores (student_id, score_sum, scored_attempts, avg_score, rank)
+        SELECT student_id, SUM(score), COUNT(score), AVG(score),
+               RANK() OVER (ORDER BY AVG(score) DESC)
+        FROM exam_attempts
+        WHERE score IS NOT NULL
+        GROUP BY student_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('student_scores', schema=None) as batch_op:
+        batch_op.drop_index('idx_student_scores_avg_score')
+
+    op.drop_table('student_scores')
@@ -0,0 +1,36 @@
+"""exam attempt deadlines
+
+Revision ID: 4c8d1e6b20fa
+Revises: e2a94f7c51d8
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8d1e6b20fa'
+down_revision = 'e2a94f7c51d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deadline_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('idx_exam_attempts_open_deadline', ['deadline_at'], unique=False, postgresql_where=sa.text('end_time IS NULL'))
+
+    # open attempts get the deadline their exam's time limit implies
+    op.execute("""
+        UPDATE exam_attempts a
+        SET deadline_at = a.start_time + e.time_limit * interval '1 minute'
+        FROM exams e
+        WHERE e.id = a.exam_id AND a.end_time IS NULL AND e.time_limit > 0
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.drop_index('idx_exam_attempts_open_deadline', postgresql_where=sa.text('end_time IS NULL'))
+        batch_op.drop_column('deadline_at')
@@ -0,0 +1,32 @@
+"""course roster indexes
+
+Revision ID: 52a225b71464
+Revises: 39e425ffba2b
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '52a225b71464'
+down_revision = '39e425ffba2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keyset pagination compares (sort_key, id) row values, which never match NULLs
+    op.execute("UPDATE course_enrollments SET progress_percent = 0 WHERE progress_percent IS NULL")
+    op.execute("UPDATE course_enrollments SET enrolled_at = now() WHERE enrolled_at IS NULL")
+
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.create_index('idx_course_enrollments_course_enrolled', ['course_id', 'enrolled_at', 'id'], unique=False)
+        batch_op.create_index('idx_course_enrollments_course_progress', ['course_id', 'progress_percent', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.drop_index('idx_course_enrollments_course_progress')
+        batch_op.drop_index('idx_course_enrollments_course_enrolled')
@@ -0,0 +1,31 @@
+"""lesson comments (lesson_id, created_at) index
+
+Revision ID: 6f0c2a9e4d1b
+Revises: cd5e879d8291
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f0c2a9e4d1b'
+down_revision = 'cd5e879d8291'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keyset pagination compares (created_at, id) row values, which never match NULLs
+    op.execute("UPDATE lesson_comments SET created_at = now() WHERE created_at IS NULL")
+
+    with op.batch_alter_table('lesson_comments', schema=None) as batch_op:
+        batch_op.drop_index('idx_lesson_comments_lesson_id')
+        batch_op.create_index('idx_lesson_comments_lesson_created', ['lesson_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lesson_comments', schema=None) as batch_op:
+        batch_op.drop_index('idx_lesson_comments_lesson_created')
+        batch_op.create_index('idx_lesson_comments_lesson_id', ['lesson_id'], unique=False)
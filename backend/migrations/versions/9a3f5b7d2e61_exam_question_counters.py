@@ -0,0 +1,45 @@
+"""exam question counters
+
+Revision ID: 9a3f5b7d2e61
+Revises: 4c8d1e6b20fa
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f5b7d2e61'
+down_revision = '4c8d1e6b20fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), server_default='0', nullable=False))
+
+    # total_points becomes the sum of question points, like the grader computes it
+    op.execute("""
+        UPDATE exams e
+        SET question_count = COALESCE(q.question_count, 0),
+            total_points = COALESCE(q.total_points, 0)
+        FROM exams e2
+        LEFT JOIN (SELECT exam_id, COUNT(*) AS question_count, SUM(points) AS total_points
+                   FROM exam_questions GROUP BY exam_id) q ON q.exam_id = e2.id
+        WHERE e2.id = e.id
+    """)
+
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.alter_column('total_points', existing_type=sa.Float(), nullable=False, server_default='0')
+        batch_op.drop_index('idx_exams_course_id')
+        batch_op.create_index('idx_exams_course_status', ['course_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.drop_index('idx_exams_course_status')
+        batch_op.create_index('idx_exams_course_id', ['course_id'], unique=False)
+        batch_op.alter_column('total_points', existing_type=sa.Float(), nullable=True, server_default=None)
+        batch_op.drop_column('question_count')
@@ -0,0 +1,50 @@
+"""add course_stats
+
+Revision ID: abd9b59ab04b
+Revises: 897f1be600df
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'abd9b59ab04b'
+down_revision = '897f1be600df'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_stats',
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('enrollment_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('chapter_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+
+    # backfill from the existing rows
+    op.execute("""
+        INSERT INTO course_stats (course_id, rating_sum, rating_count, enrollment_count, chapter_count)
+        SELECT c.id,
+               COALESCE(r.rating_sum, 0),
+               COALESCE(r.rating_count, 0),
+               COALESCE(e.enrollment_count, 0),
+               COALESCE(ch.chapter_count, 0)
+        FROM courses c
+        LEFT JOIN (SELECT course_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+                   FROM course_ratings GROUP BY course_id) r ON r.course_id = c.id
+        LEFT JOIN (SELECT course_id, COUNT(*) AS enrollment_count
+                   FROM course_enrollments GROUP BY course_id) e ON e.course_id = c.id
+        LEFT JOIN (SELECT course_id, COUNT(*) AS chapter_count
+                   FROM course_chapters GROUP BY course_id) ch ON ch.course_id = c.id
+    """)
+
+
+def downgrade():
+    op.drop_table('course_stats')
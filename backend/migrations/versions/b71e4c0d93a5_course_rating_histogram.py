@@ -0,0 +1,55 @@
+"""course rating histogram and reviews index
+
+Revision ID: b71e4c0d93a5
+Revises: 6f0c2a9e4d1b
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e4c0d93a5'
+down_revision = '6f0c2a9e4d1b'
+branch_labels = None
+depends_on = None
+
+STARS = range(1, 6)
+
+
+def upgrade():
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        for star in STARS:
+            batch_op.add_column(sa.Column(f'rating_{star}', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill from the existing ratings
+    op.execute("""
+        UPDATE course_stats s
+        SET rating_1 = r.rating_1, rating_2 = r.rating_2, rating_3 = r.rating_3,
+            rating_4 = r.rating_4, rating_5 = r.rating_5
+        FROM (SELECT course_id,
+                     COUNT(*) FILTER (WHERE rating = 1) AS rating_1,
+                     COUNT(*) FILTER (WHERE rating = 2) AS rating_2,
+                     COUNT(*) FILTER (WHERE rating = 3) AS rating_3,
+                     COUNT(*) FILTER (WHERE rating = 4) AS rating_4,
+                     COUNT(*) FILTER (WHERE rating = 5) AS rating_5
+              FROM course_ratings GROUP BY course_id) r
+        WHERE r.course_id = s.course_id
+    """)
+
+    op.execute("UPDATE course_ratings SET created_at = now() WHERE created_at IS NULL")
+
+    with op.batch_alter_table('course_ratings', schema=None) as batch_op:
+        batch_op.drop_index('idx_course_ratings_course_id')
+        batch_op.create_index('idx_course_ratings_course_created', ['course_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('course_ratings', schema=None) as batch_op:
+        batch_op.drop_index('idx_course_ratings_course_created')
+        batch_op.create_index('idx_course_ratings_course_id', ['course_id'], unique=False)
+
+    with op.batch_alter_table('course_stats', schema=None) as batch_op:
+        for star in reversed(STARS):
+            batch_op.drop_column(f'rating_{star}')
@@ -0,0 +1,44 @@
+"""add upload_jobs
+
+Revision ID: cd5e879d8291
+Revises: 0818508b33ed
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd5e879d8291'
+down_revision = '0818508b33ed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('target_id', sa.UUID(), nullable=False),
+    sa.Column('spool_path', sa.Text(), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('result_url', sa.Text(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_jobs', schema=None) as batch_op:
+        batch_op.create_index('idx_upload_jobs_status', ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_upload_jobs_status')
+
+    op.drop_table('upload_jobs')
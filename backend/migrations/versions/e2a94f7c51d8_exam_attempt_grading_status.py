@@ -0,0 +1,31 @@
+"""exam attempt grading status
+
+Revision ID: e2a94f7c51d8
+Revises: b71e4c0d93a5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a94f7c51d8'
+down_revision = 'b71e4c0d93a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('grading_status', sa.String(length=20), nullable=True))
+        batch_op.create_index('idx_exam_attempts_grading_pending', ['end_time'], unique=False, postgresql_where=sa.text("grading_status = 'pending'"))
+
+    # every attempt submitted so far was graded synchronously
+    op.execute("UPDATE exam_attempts SET grading_status = 'graded' WHERE end_time IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.drop_index('idx_exam_attempts_grading_pending', postgresql_where=sa.text("grading_status = 'pending'"))
+        batch_op.drop_column('grading_status')